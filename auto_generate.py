@@ -1,202 +1,136 @@
+import argparse
+import html
 import os
+import time
+from pathlib import Path
+
+from build_metrics import metrics, profiled
+from html_minify import print_report as print_minify_report
+from page_templates import Template, stylesheet_name, write_stylesheet
+from precompress import compress_outputs, iter_compressible, print_report
+from name_data import load_catalogue
+from output_writer import shared_writer
+from related_names import RelatedIndex
 
 # ---------- SETTINGS ----------
 BASE_URL = "https://mynamefinder.netlify.app"
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 NAMES_FILE = os.path.join(PROJECT_DIR, "names_master.txt")
+CSV_FILE = os.path.join(PROJECT_DIR, "names.csv")
 NAMES_DIR = os.path.join(PROJECT_DIR, "names")
+ASSETS_DIR = os.path.join(PROJECT_DIR, "assets")
 SITEMAP_FILE = os.path.join(PROJECT_DIR, "sitemap.txt")
+REPORT_FILE = os.path.join(PROJECT_DIR, ".auto-generate-report.json")
+RELATED_COUNT = 4
 
 
 def generate_meaning(name: str) -> str:
     """Return a meaning string for a given name."""
-    key = name.strip().lower()
-
-    meanings = {
-        "arjun": "Arjun means bright, shining, or white. Symbolizes courage, heroism, and intelligence.",
-        "aarav": "Aarav means peace, calmness, and wisdom. Associated with a peaceful and intelligent personality.",
-        "vivaan": "Vivaan means full of life, energy, and vibrance. Represents enthusiasm and freshness.",
-        "krish": "Krish is short for Krishna, meaning one who attracts. Represents charm, love, and positivity.",
-        "shivansh": "Shivansh means a part of Lord Shiva. Symbolizes strength, spirituality, and deep inner power.",
-        "keshav": "Keshav is a name of Krishna, meaning one with beautiful hair. Represents love and kindness.",
-        "rudra": "Rudra is a form of Shiva, symbolizing power, storm, and transformation.",
-        "arnav": "Arnav means ocean or sea, symbolizing depth, vastness, and emotional strength.",
-        "yash": "Yash means fame, success, and glory. Represents achievement and recognition.",
-        "lakshay": "Lakshay means target or aim. Symbolizes ambition, focus, and direction.",
-        "priya": "Priya means beloved, dear one. Symbolizes affection, warmth, and kindness.",
-        "diya": "Diya means lamp or light. Represents brightness, hope, and positivity.",
-        "advika": "Advika means unique or one of a kind. Symbolizes individuality and uniqueness.",
-        "ishika": "Ishika means paintbrush or sacred arrow. Represents creativity and purpose.",
-        "anvi": "Anvi is a name of Goddess Lakshmi, meaning kind and compassionate.",
-        "radha": "Radha symbolizes devotion, love, and purity as the consort of Lord Krishna.",
-        "charvi": "Charvi means beautiful and charming. Represents grace and inner beauty.",
-        "tanvi": "Tanvi means delicate and beautiful girl. Represents elegance and softness.",
-        "nidhi": "Nidhi means treasure or wealth. Represents abundance and prosperity.",
-        "manya": "Manya means worthy of honor and respect.",
-        "ali": "Ali means high, elevated, or champion. Symbolizes strength and honor.",
-        "yusuf": "Yusuf means God increases. Represents blessings, growth, and prosperity.",
-        "ahmed": "Ahmed means highly praised or one who constantly thanks God.",
-        "imran": "Imran means prosperity or exaltation. A respected and traditional name.",
-        "omar": "Omar means flourishing, long-lived, or eloquent speaker.",
-        "kabir": "Kabir means great or noble. Symbolizes wisdom and spiritual strength.",
-        "ayaan": "Ayaan means gift of God or blessing. Symbolizes good fortune and protection.",
-        "rehan": "Rehan means sweet basil, fragrance, or kingly. Represents freshness and grace.",
-        "faisal": "Faisal means decisive, strong judge, or one who settles arguments.",
-        "muhammad": "Muhammad means the praised one. The name of the Prophet, symbolizing high respect.",
-        "zara": "Zara means princess, flower, or shining star. Represents elegance and brightness.",
-        "ayesha": "Ayesha means lively, prosperous, or life. A respected Islamic name.",
-        "noor": "Noor means light or radiance. Represents guidance and illumination.",
-        "sara": "Sara means princess or noblewoman. Represents purity and grace.",
-        "maryam": "Maryam means beloved, pure, or elevated. The mother of Isa (Jesus).",
-        "sana": "Sana means brilliance, radiance, or praise.",
-        "meera": "Meera symbolizes devotion to Lord Krishna. Represents love and spirituality.",
-        "ira": "Ira means earth or speech. Associated with Goddess Saraswati in some traditions.",
-        "kavya": "Kavya means poetry. Represents artistic talent and creativity.",
-        "saanvi": "Saanvi is a name of Goddess Lakshmi, symbolizing beauty and prosperity.",
-        "myra": "Myra means beloved, admirable, or sweet.",
-        "anika": "Anika means graceful and brilliant. Linked to Goddess Durga.",
-        "riya": "Riya means singer or graceful. Represents charm and expression.",
-        "tara": "Tara means star. Represents guidance, light, and hope.",
-        "samaira": "Samaira means enchanting or protected.",
-        "arohi": "Arohi means ascending or musical tune.",
-        "isha": "Isha is another name of Goddess Parvati, meaning protector or supreme.",
-        "aditi": "Aditi means boundless and motherly. Associated with freedom.",
-        "shruti": "Shruti means musical note or sound. Represents knowledge.",
-        "divya": "Divya means divine or heavenly.",
-        "tejas": "Tejas means brilliance, sharpness, or glow.",
-        "aryan": "Aryan means noble or honorable.",
-        "ansh": "Ansh means portion or part of.",
-        "dev": "Dev means god or divine.",
-        "vihaan": "Vihaan means dawn or beginning of a new era.",
-        "ishaan": "Ishaan means sun or Lord Shiva.",
-        "shaurya": "Shaurya means bravery or heroism.",
-        "dhruv": "Dhruv means pole star, symbolizing stability.",
-        "atharv": "Atharv means wise or learned.",
-        "raghav": "Raghav means descendant of King Raghu.",
-        "rohan": "Rohan means ascending or sandalwood.",
-        "manav": "Manav means human or humane.",
-        "naman": "Naman means salutation or respect.",
-        "varun": "Varun means lord of water.",
-        "kartik": "Kartik is associated with Lord Murugan.",
-        "gautam": "Gautam means bright or enlightened (Gautam Buddha).",
-        "siddharth": "Siddharth means one who has attained enlightenment.",
-        "nikhil": "Nikhil means complete or whole.",
-        "kunal": "Kunal means lotus.",
-        "simran": "Simran means remembrance (of God).",
-        "neha": "Neha means love, rain, or affection.",
-        "ritika": "Ritika means movement or stream.",
-        "parth": "Parth means warrior prince (Arjuna).",
-        "reyansh": "Reyansh means ray of light or part of Lord Vishnu.",
-        "ishita": "Ishita means mastery, excellence.",
-        "jhanvi": "Jhanvi means Ganga river.",
-        "kritika": "Kritika means star or creativity.",
-        "tanisha": "Tanisha means ambitious or desire.",
-        "harsh": "Harsh means happiness or joy.",
-        "aditya": "Aditya means sun or son of Aditi.",
-        "samar": "Samar means battle or companion in war.",
-        "ranveer": "Ranveer means brave warrior.",
-        "rahul": "Rahul means conqueror of miseries.",
-        "harshit": "Harshit means joyous or happy.",
-        "devansh": "Devansh means part of God.",
-        "hridaan": "Hridaan means great heart or kind-hearted.",
-        "ayaan": "Ayaan means blessing or gift of God.",
-        }
-
-
-    if key in meanings:
-        return meanings[key]
-
-    # fallback for unknown names
-    proper = name.strip().capitalize()
-    return (
-        f"The name {proper} is associated with positivity, individuality, and a strong personality. "
-        f"It reflects confidence and a unique identity."
-    )
-
-
-def build_name_page(name: str) -> str:
-    """Return HTML content for a name page."""
-    name_clean = name.strip()
-    title_name = name_clean
-    meaning_text = generate_meaning(name_clean)
+    return load_catalogue(Path(CSV_FILE), Path(NAMES_FILE)).describe(name)
+
+
+# Shared by every generated page; written once to assets/ under a content-hashed name.
+NAME_PAGE_CSS = """body {
+    font-family: Arial, sans-serif;
+    background: #f4f7fb;
+    margin: 0;
+    padding: 0;
+}
+
+.container {
+    max-width: 800px;
+    margin: auto;
+    margin-top: 40px;
+    background: white;
+    padding: 25px;
+    border-radius: 12px;
+    box-shadow: 0 0 12px rgba(0,0,0,0.1);
+}
+
+h1 {
+    color: #4A90E2;
+    margin-bottom: 10px;
+}
+
+.section {
+    margin-top: 20px;
+    padding: 15px;
+    background: #eef5ff;
+    border-left: 4px solid #4A90E2;
+    border-radius: 8px;
+}
+
+a {
+    text-decoration: none;
+    color: #4A90E2;
+    font-size: 16px;
+}
+
+a:hover {
+    text-decoration: underline;
+}
+"""
+NAME_PAGE_STYLESHEET = stylesheet_name(NAME_PAGE_CSS, "name-page")
 
-    html = f"""<!DOCTYPE html>
+NAME_PAGE_TEMPLATE = Template("""<!DOCTYPE html>
 <html lang="en">
 <head>
-<title>{title_name} Name Meaning | Origin, Personality, Numerology</title>
-<meta name="description" content="Discover the meaning of the name {title_name}, including its origin, significance, personality traits, numerology, and unique characteristics.">
-<style>
-    body {{
-        font-family: Arial, sans-serif;
-        background: #f4f7fb;
-        margin: 0;
-        padding: 0;
-    }}
-
-    .container {{
-        max-width: 800px;
-        margin: auto;
-        margin-top: 40px;
-        background: white;
-        padding: 25px;
-        border-radius: 12px;
-        box-shadow: 0 0 12px rgba(0,0,0,0.1);
-    }}
-
-    h1 {{
-        color: #4A90E2;
-        margin-bottom: 10px;
-    }}
-
-    .section {{
-        margin-top: 20px;
-        padding: 15px;
-        background: #eef5ff;
-        border-left: 4px solid #4A90E2;
-        border-radius: 8px;
-    }}
-
-    a {{
-        text-decoration: none;
-        color: #4A90E2;
-        font-size: 16px;
-    }}
-
-    a:hover {{
-        text-decoration: underline;
-    }}
-</style>
+<title>{{title_name}} Name Meaning | Origin, Personality, Numerology</title>
+<meta name="description" content="Discover the meaning of the name {{title_name}}, including its origin, significance, personality traits, numerology, and unique characteristics.">
+<link rel="stylesheet" href="../assets/{{stylesheet}}">
 </head>
 
 <body>
 <div class="container">
     <a href="../index.html">← Back to Home</a>
-    <h1>{title_name} — Name Meaning</h1>
+    <h1>{{title_name}} — Name Meaning</h1>
 
     <div class="section">
-        <h3>Meaning of {title_name}</h3>
-        <p>{meaning_text}</p>
+        <h3>Meaning of {{title_name}}</h3>
+        <p>{{meaning_text}}</p>
     </div>
 
     <div class="section">
         <h3>Origin</h3>
-        <p>Origin details for the name {title_name} will be added soon.</p>
+        <p>Origin details for the name {{title_name}} will be added soon.</p>
     </div>
 
     <div class="section">
         <h3>Numerology</h3>
-        <p>Numerology insights for the name <b>{title_name}</b> will be added.</p>
+        <p>Numerology insights for the name <b>{{title_name}}</b> will be added.</p>
     </div>
 
-    <div class="section">
-        <h3>Related Names</h3>
-        <p>Explore similar names: <a href="arjun.html">Arjun</a>, <a href="aarav.html">Aarav</a>, <a href="vivaan.html">Vivaan</a>, <a href="priya.html">Priya</a>.</p>
-    </div>
-</div>
+{{related_html}}</div>
 </body>
 </html>
+""").bind(stylesheet=NAME_PAGE_STYLESHEET)
+
+
+def build_related_index(names: list) -> RelatedIndex:
+    """Index the published names with their origin/gender from names.csv."""
+    catalogue = load_catalogue(Path(CSV_FILE), Path(NAMES_FILE))
+    index = RelatedIndex()
+    for name in names:
+        index.add(name, slugify_name(name), catalogue.origin(name), catalogue.gender(name))
+    return index
+
+
+def build_name_page(name: str, related=()) -> str:
+    """Return HTML content for a name page; related is a list of (name, slug) pairs."""
+    name_clean = name.strip()
+    related_html = ""
+    if related:
+        links = ", ".join(f'<a href="{slug}.html">{html.escape(other)}</a>' for other, slug in related)
+        related_html = f"""    <div class="section">
+        <h3>Related Names</h3>
+        <p>Explore similar names: {links}.</p>
+    </div>
 """
-    return html
+    return NAME_PAGE_TEMPLATE.render(
+        title_name=name_clean,
+        meaning_text=html.escape(generate_meaning(name_clean)),
+        related_html=related_html,
+    )
 
 
 def load_names() -> list:
@@ -204,23 +138,7 @@ def load_names() -> list:
     if not os.path.exists(NAMES_FILE):
         print("names_master.txt not found.")
         return []
-
-    names = []
-    with open(NAMES_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            name = line.strip()
-            if name:
-                names.append(name)
-
-    # remove duplicates while preserving order
-    seen = set()
-    unique = []
-    for n in names:
-        key = n.lower()
-        if key not in seen:
-            seen.add(key)
-            unique.append(n)
-    return unique
+    return load_catalogue(Path(CSV_FILE), Path(NAMES_FILE)).master_names
 
 
 def slugify_name(name: str) -> str:
@@ -233,19 +151,24 @@ def ensure_names_dir():
         os.makedirs(NAMES_DIR)
 
 
+def write_name_page(name: str, slug: str, related_index: RelatedIndex):
+    """Queue one name page on the shared writer."""
+    with metrics.span("build_html"):
+        page = build_name_page(name, related_index.related(slug, RELATED_COUNT))
+    shared_writer().write(Path(os.path.join(NAMES_DIR, f"{slug}.html")), page, "write_name_page")
+    metrics.log(f"Generated: {slug}.html")
+
+
 def generate_all_pages(names: list):
     """Generate HTML files for all names."""
     ensure_names_dir()
+    write_stylesheet(NAME_PAGE_CSS, ASSETS_DIR, "name-page")
+    with metrics.span("related_index"):
+        related_index = build_related_index(names)
+    # Pages are written atomically on background threads; unchanged files are left alone.
     for name in names:
-        slug = slugify_name(name)
-        filename = f"{slug}.html"
-        filepath = os.path.join(NAMES_DIR, filename)
-
-        html = build_name_page(name)
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(html)
-
-        print(f"Generated: {filename}")
+        write_name_page(name, slugify_name(name), related_index)
+    shared_writer().flush()
 
 
 def generate_sitemap(names: list):
@@ -288,17 +211,171 @@ def generate_sitemap(names: list):
 
 
 
-def main():
-    names = load_names()
+def generate(args):
+    """One full pass: name pages, sitemap.txt and the optional minify/compress reports."""
+    metrics.reset()
+    metrics.quiet = args.quiet
+
+    with metrics.span("load_names"):
+        names = load_names()
     if not names:
         print("No names found in names_master.txt")
         return
 
     print(f"Loaded {len(names)} unique names.")
-    generate_all_pages(names)
-    generate_sitemap(names)
+    shared_writer(minify=args.minify)
+    with profiled(args.profile), metrics.span("generate_all_pages"):
+        generate_all_pages(names)
+    with metrics.span("generate_sitemap"):
+        generate_sitemap(names)
+    if args.minify:
+        print_minify_report(metrics.counters["minify_bytes_in"], metrics.counters["minify_bytes_out"])
+    if args.compress:
+        paths = [*iter_compressible(NAMES_DIR), *iter_compressible(ASSETS_DIR), SITEMAP_FILE]
+        with metrics.span("compress"):
+            print_report(compress_outputs(paths))
+    metrics.write_report(Path(args.report), generator="auto_generate", pages=len(names))
+    metrics.print_summary()
     print("All pages and sitemap generated successfully.")
 
 
+def page_inputs(names: list):
+    """slug -> (name, origin, gender, meaning text), all a name page is built from besides its
+    related links; None when two names share a slug."""
+    catalogue = load_catalogue(Path(CSV_FILE), Path(NAMES_FILE))
+    pages = {}
+    for name in names:
+        pages[slugify_name(name)] = (name, catalogue.origin(name), catalogue.gender(name),
+                                     catalogue.describe(name.strip()))
+    return pages if len(pages) == len(names) else None
+
+
+class WatchState:
+    """What the last pass published: the names, their page_inputs() and the RelatedIndex over
+    them, kept between --watch updates."""
+
+    def __init__(self, names: list):
+        self.names = names
+        self.pages = page_inputs(names)
+        self.related = RelatedIndex()
+        for slug, (name, origin, gender, _meaning) in (self.pages or {}).items():
+            self.related.add(name, slug, origin, gender)
+
+
+def update(state: WatchState, args) -> WatchState:
+    """Bring the output up to date with one edit of names_master.txt/names.csv: re-render the
+    pages of added and changed names and those whose related links they can move
+    (RelatedIndex.affected, taken before a name is removed and after it is added), delete the
+    pages of removed names and rewrite sitemap.txt if the name list changed. Runs a full pass
+    instead while two names share a slug."""
+    metrics.reset()
+    metrics.quiet = args.quiet
+    with metrics.span("load_names"):
+        names = load_names()
+        pages = page_inputs(names) if names else None
+    if state.pages is None or pages is None:
+        generate(args)
+        return WatchState(load_names())
+
+    old = state.pages
+    gone = old.keys() - pages.keys()
+    dirty = {slug for slug, inputs in pages.items() if old.get(slug) != inputs}
+    with metrics.span("related_index"):
+        for slug in gone:
+            dirty.update(state.related.affected(slug))
+            state.related.remove(slug)
+        # Only a new name, origin or gender moves related links; a meaning edit is local.
+        for slug in [slug for slug in dirty if old.get(slug, ())[:3] != pages[slug][:3]]:
+            if slug in old:
+                dirty.update(state.related.affected(slug))
+                state.related.remove(slug)
+            name, origin, gender, _meaning = pages[slug]
+            state.related.add(name, slug, origin, gender)
+            dirty.update(state.related.affected(slug))
+    dirty -= gone
+
+    writer = shared_writer(minify=args.minify)
+    writer.written = [] if args.compress else None
+    with metrics.span("generate_all_pages"):
+        for slug in sorted(dirty):
+            write_name_page(pages[slug][0], slug, state.related)
+        writer.flush()
+    for slug in sorted(gone):
+        page = os.path.join(NAMES_DIR, f"{slug}.html")
+        for path in (page, page + ".gz", page + ".br"):
+            Path(path).unlink(missing_ok=True)
+        metrics.log(f"Removed: {slug}.html")
+    if names != state.names:
+        with metrics.span("generate_sitemap"):
+            generate_sitemap(names)
+        if writer.written is not None:
+            writer.written.append(Path(SITEMAP_FILE))
+    if args.minify:
+        print_minify_report(metrics.counters["minify_bytes_in"], metrics.counters["minify_bytes_out"])
+    if args.compress:
+        with metrics.span("compress"):
+            print_report(compress_outputs(writer.written))
+        writer.written = None
+    state.names, state.pages = names, pages
+    metrics.write_report(Path(args.report), generator="auto_generate", pages=len(names))
+    print(f"[watch] {len(dirty)} page(s) re-rendered, {len(gone)} removed")
+    return state
+
+
+def input_signature():
+    """(mtime_ns, size) of names_master.txt and names.csv; None for a missing file."""
+    signature = []
+    for path in (NAMES_FILE, CSV_FILE):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return signature
+
+
+def watch(args):
+    """Poll names_master.txt and names.csv (origins/genders feed the related links) and update()
+    the output after every change, re-rendering only the pages the edit touches."""
+    print(f"[watch] Watching {NAMES_FILE} and {CSV_FILE} (Ctrl+C to stop)")
+    signature = input_signature()
+    state = WatchState(load_names())
+    try:
+        while True:
+            time.sleep(args.watch_interval)
+            current = input_signature()
+            if current == signature:
+                continue
+            signature = current
+            start = time.perf_counter()
+            load_catalogue.cache_clear()
+            state = update(state, args)
+            print(f"[watch] Updated in {time.perf_counter() - start:.2f} s")
+    except KeyboardInterrupt:
+        print("[watch] Stopped")
+    finally:
+        shared_writer().close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate name pages and sitemap.txt from names_master.txt.")
+    parser.add_argument("--compress", action="store_true",
+                        help="also write .gz (and .br if brotli is installed) next to generated files")
+    parser.add_argument("--minify", action="store_true",
+                        help="strip insignificant whitespace and comments from the generated pages")
+    parser.add_argument("--quiet", action="store_true", help="no per-file output, only phase summaries")
+    parser.add_argument("--report", default=REPORT_FILE, help="where to write the JSON build report")
+    parser.add_argument("--profile", default=None, metavar="PATH", help="cProfile the page loop and dump stats to PATH")
+    parser.add_argument("--watch", action="store_true",
+                        help="after the first pass, regenerate whenever names_master.txt or names.csv changes")
+    parser.add_argument("--watch-interval", type=float, default=0.5,
+                        help="seconds between --watch polls (default 0.5)")
+    args = parser.parse_args(argv)
+
+    generate(args)
+    if args.watch:
+        watch(args)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,253 @@
+# bench.py
+# Build-performance benchmarks on synthetic catalogues.
+#
+# For every size a throwaway workspace is made (copies of the generator scripts plus a
+# synthetic names.csv / names_master.txt), and each phase runs in a fresh child process
+# so wall time, peak RSS and the tracemalloc peak belong to that phase alone.
+#
+#   python bench.py                              # 1k, 100k and 1M names
+#   python bench.py --sizes 1000 20000 --out before.json
+#   python bench.py --sizes 20000 --out after.json --compare before.json
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).parent.resolve()
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_OUT = ROOT / "bench-results.json"
+
+# (pipeline, phase) in run order; "incremental" reruns the generator with nothing changed.
+PHASES = [
+    ("generate_name_pages", "read_csv"),
+    ("generate_name_pages", "related_index"),
+    ("generate_name_pages", "full"),
+    ("generate_name_pages", "incremental"),
+    ("auto_generate", "full"),
+]
+
+# ---- Synthetic catalogue ----
+# Rough shape of the real data: mostly Sanskrit/Arabic names, a long tail of origins,
+# near-even gender split, 1-4 syllables, and a few percent of accented / non-Latin names.
+ORIGINS = [
+    ("Sanskrit", 30), ("Arabic", 14), ("Hebrew", 8), ("Latin", 8), ("Greek", 7), ("English", 7),
+    ("Persian", 5), ("Japanese", 4), ("Tamil", 4), ("Irish", 3), ("German", 3), ("French", 3),
+    ("Spanish", 2), ("Slavic", 1), ("Norse", 1),
+]
+GENDERS = [("Male", 45), ("Female", 45), ("Unisex", 8), ("", 2)]
+SYLLABLE_COUNTS = [(1, 5), (2, 45), (3, 38), (4, 12)]
+SYLLABLES = [
+    "a", "aa", "ra", "ri", "ru", "na", "ni", "ya", "sha", "vi", "ka", "ki", "ma", "mi", "la",
+    "li", "da", "dh", "ta", "ti", "ha", "ja", "sa", "si", "va", "an", "ar", "el", "en", "is",
+    "o", "ro", "lo", "mo", "be", "ca", "de", "fa", "ga", "ho", "ju", "ke", "lu", "me", "no",
+    "pe", "qu", "se", "th", "vo", "wa", "xa", "ze", "yu", "ish", "av", "ul", "ay", "ei", "ou",
+]
+ACCENTS = {"a": "áàâä", "e": "éèêë", "i": "íï", "o": "óôö", "u": "úü", "n": "ñ", "c": "ç"}
+NON_LATIN = ["Łukasz", "Søren", "Zoë", "Ærin", "Dvořák", "Ōta", "Ğül", "Ţara", "Şebnem", "Ħanna"]
+MEANINGS = ["Peaceful", "Graceful", "Brave", "Light", "Gift of God", "Victory", "Wise", "Moon",
+            "Ocean", "Beloved", "Strong", "Noble", "Joy", "Star", "Flower"]
+TRAITS = ["calm and wise", "creative and thoughtful", "bold and loyal", "gentle and kind",
+          "curious and bright"]
+
+
+def _weighted(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def synthetic_names(n: int, seed: int = 0):
+    """Yield n distinct synthetic names."""
+    rng = random.Random(seed)
+    seen = set()
+    while len(seen) < n:
+        syllables = [rng.choice(SYLLABLES) for _ in range(_weighted(rng, SYLLABLE_COUNTS))]
+        name = "".join(syllables)
+        roll = rng.random()
+        if roll < 0.03:
+            i = rng.randrange(len(name))
+            if name[i] in ACCENTS:
+                name = name[:i] + rng.choice(ACCENTS[name[i]]) + name[i + 1:]
+        elif roll < 0.035:
+            name = rng.choice(NON_LATIN) + name
+        name = name.capitalize()
+        if len(name) < 2 or name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        yield name, syllables
+
+
+def write_catalogue(workspace: Path, n: int, seed: int = 0):
+    """Write names.csv and names_master.txt with n synthetic names."""
+    rng = random.Random(seed + 1)
+    with open(workspace / "names.csv", "w", encoding="utf-8", newline="") as f_csv, \
+            open(workspace / "names_master.txt", "w", encoding="utf-8") as f_master:
+        writer = csv.writer(f_csv)
+        writer.writerow(["name", "meaning", "origin", "gender", "traits", "pronunciation"])
+        for name, syllables in synthetic_names(n, seed):
+            writer.writerow([name, rng.choice(MEANINGS), _weighted(rng, ORIGINS), _weighted(rng, GENDERS),
+                             rng.choice(TRAITS), "-".join(syllables)])
+            f_master.write(name + "\n")
+
+
+def make_workspace(n: int, seed: int = 0) -> Path:
+    workspace = Path(tempfile.mkdtemp(prefix=f"namebench-{n}-"))
+    for script in ROOT.glob("*.py"):
+        shutil.copy2(script, workspace / script.name)
+    write_catalogue(workspace, n, seed)
+    return workspace
+
+# ---- Phase runner (child process) ----
+def _max_rss_mb(who) -> float:
+    rss = resource.getrusage(who).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_phase(workspace: Path, pipeline: str, phase: str, workers: int, trace: bool) -> dict:
+    sys.path.insert(0, str(workspace))
+    module = __import__(pipeline)
+    if pipeline == "generate_name_pages":
+        gen_args = ["--deterministic", "--workers", str(workers)]
+        if phase == "read_csv":
+            call = lambda: sum(1 for _ in module.iter_csv(module.CSV_FILE))  # noqa: E731
+        elif phase == "related_index":
+            call = lambda: len(module.build_related_index(module.CSV_FILE))  # noqa: E731
+        elif phase == "full":
+            call = lambda: module.main(gen_args + ["--force"])  # noqa: E731
+        else:
+            call = lambda: module.main(gen_args)  # noqa: E731
+    else:
+        call = lambda: module.main([])  # noqa: E731
+
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        call()
+    wall = time.perf_counter() - start
+    result = {"wall_s": round(wall, 3), "rss_peak_mb": round(_max_rss_mb(resource.RUSAGE_SELF), 1),
+              "children_rss_peak_mb": round(_max_rss_mb(resource.RUSAGE_CHILDREN), 1)}
+    if trace:
+        result["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1)
+        tracemalloc.stop()
+    return result
+
+
+def bench_phase(workspace: Path, n: int, pipeline: str, phase: str, workers: int, trace: bool) -> dict:
+    """Run one phase in a fresh interpreter and return its measurements."""
+    result_file = workspace / "phase-result.json"
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--run-phase", str(workspace), pipeline, phase,
+           "--workers", str(workers)]
+    if not trace:
+        cmd.append("--no-tracemalloc")
+    subprocess.run(cmd, check=True, cwd=workspace, stdout=subprocess.DEVNULL)
+    result = json.loads(result_file.read_text(encoding="utf-8"))
+    result_file.unlink()
+    result.update(size=n, pipeline=pipeline, phase=phase, pages=n if phase != "read_csv" else 0)
+    result["pages_per_s"] = round(n / result["wall_s"], 1) if result["pages"] and result["wall_s"] else None
+    return result
+
+# ---- Reporting ----
+def print_result(r: dict):
+    rate = f"{r['pages_per_s']:>10,.0f} pages/s" if r["pages_per_s"] else " " * 17
+    traced = f"  tracemalloc {r['tracemalloc_peak_mb']:>7.1f} MB" if "tracemalloc_peak_mb" in r else ""
+    print(f"[bench] {r['size']:>9,} {r['pipeline']:<20} {r['phase']:<14} {r['wall_s']:>9.2f} s {rate}"
+          f"  rss {r['rss_peak_mb']:>7.1f} MB (workers {r['children_rss_peak_mb']:.1f} MB){traced}")
+
+
+def compare(results: list, baseline_path: Path):
+    """Print wall-time and RSS ratios against an earlier results file."""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    before = {(r["size"], r["pipeline"], r["phase"]): r for r in baseline["runs"]}
+    print(f"[compare] against {baseline_path} ({baseline.get('created', '?')})")
+    for r in results:
+        old = before.get((r["size"], r["pipeline"], r["phase"]))
+        if not old:
+            continue
+        speedup = old["wall_s"] / r["wall_s"] if r["wall_s"] else float("inf")
+        print(f"[compare] {r['size']:>9,} {r['pipeline']:<20} {r['phase']:<14} "
+              f"{old['wall_s']:.2f} s -> {r['wall_s']:.2f} s ({speedup:.2f}x), "
+              f"rss {old['rss_peak_mb']:.1f} -> {r['rss_peak_mb']:.1f} MB")
+
+
+def git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip()
+    except OSError:
+        return ""
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the site generators on synthetic catalogues.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="catalogue sizes to run")
+    parser.add_argument("--phases", nargs="+", default=None,
+                        help="only these phases, as pipeline:phase or phase (e.g. full, auto_generate:full)")
+    parser.add_argument("--workers", type=int, default=0, help="render workers for generate_name_pages (0 = all cores)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic catalogue")
+    parser.add_argument("--out", type=Path, default=DEFAULT_OUT, help=f"results file (default {DEFAULT_OUT.name})")
+    parser.add_argument("--compare", type=Path, default=None, help="earlier results file to compare against")
+    parser.add_argument("--no-tracemalloc", action="store_true",
+                        help="skip tracemalloc (it slows Python-heavy phases down noticeably)")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary workspaces")
+    parser.add_argument("--run-phase", nargs=3, metavar=("WORKSPACE", "PIPELINE", "PHASE"), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    trace = not args.no_tracemalloc
+    if args.run_phase:
+        workspace, pipeline, phase = args.run_phase
+        result = run_phase(Path(workspace), pipeline, phase, args.workers, trace)
+        (Path(workspace) / "phase-result.json").write_text(json.dumps(result), encoding="utf-8")
+        return
+
+    phases = PHASES
+    if args.phases:
+        phases = [p for p in PHASES if f"{p[0]}:{p[1]}" in args.phases or p[1] in args.phases]
+    results = []
+    for n in args.sizes:
+        start = time.perf_counter()
+        workspace = make_workspace(n, args.seed)
+        print(f"[bench] {n:,} names: catalogue written in {time.perf_counter() - start:.1f} s ({workspace})")
+        try:
+            for pipeline, phase in phases:
+                result = bench_phase(workspace, n, pipeline, phase, args.workers, trace)
+                print_result(result)
+                results.append(result)
+        finally:
+            if not args.keep:
+                shutil.rmtree(workspace, ignore_errors=True)
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "workers": args.workers,
+        "tracemalloc": trace,
+        "runs": results,
+    }
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"[bench] Results saved to {args.out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# build_metrics.py
+# Build instrumentation shared by generate_name_pages.py and auto_generate.py: timed spans,
+# counters, optional cProfile capture, quiet per-file logging and a JSON build report.
+#
+# Pool workers keep their own BuildMetrics; they hand back snapshot() with each chunk of
+# results and the parent merge()s it, so span seconds for worker phases are summed across
+# processes (CPU-style time), not wall time.
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+class BuildMetrics:
+    """Span timings and counters for one build."""
+
+    def __init__(self):
+        self.quiet = False
+        self.reset()
+
+    def reset(self):
+        # A fresh lock too: a forked pool worker may inherit one held by a writer thread.
+        self._lock = threading.Lock()
+        self.spans = {}          # name -> [calls, seconds]
+        self.counters = Counter()
+        self.started = time.perf_counter()
+
+    def add(self, name: str, seconds: float, calls: int = 1):
+        """Charge `seconds` to span `name` (thread-safe; used by the output writer threads)."""
+        with self._lock:
+            span = self.spans.setdefault(name, [0, 0.0])
+            span[0] += calls
+            span[1] += seconds
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed_iter(self, name: str, iterable):
+        """Yield from iterable, charging the time spent producing each item to span `name`."""
+        it = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start)
+                return
+            self.add(name, time.perf_counter() - start, 0)
+            yield item
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def log(self, message: str):
+        """Per-file progress line; dropped in quiet mode."""
+        if not self.quiet:
+            print(message)
+
+    def snapshot(self) -> dict:
+        return {"spans": {name: list(v) for name, v in self.spans.items()}, "counters": dict(self.counters)}
+
+    def merge(self, snapshot: dict):
+        for name, (calls, seconds) in snapshot["spans"].items():
+            self.add(name, seconds, calls)
+        with self._lock:
+            self.counters.update(snapshot["counters"])
+
+    def report(self, **extra) -> dict:
+        spans = sorted(self.spans.items(), key=lambda item: -item[1][1])
+        return {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "wall_s": round(time.perf_counter() - self.started, 3),
+            "spans": {name: {"calls": calls, "seconds": round(seconds, 4)} for name, (calls, seconds) in spans},
+            "counters": dict(sorted(self.counters.items())),
+            **extra,
+        }
+
+    def write_report(self, path: Path, **extra) -> dict:
+        report = self.report(**extra)
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+        return report
+
+    def print_summary(self, top: int = 8):
+        """One line per slowest span, for the end of a build."""
+        for name, (calls, seconds) in sorted(self.spans.items(), key=lambda item: -item[1][1])[:top]:
+            print(f"[timing] {name:<22} {seconds:9.3f} s  ({calls:,} calls)")
+
+
+metrics = BuildMetrics()
+
+
+@contextmanager
+def profiled(path=None, top: int = 20):
+    """cProfile the enclosed block when path is given: dump stats there and print the top entries."""
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(str(path))
+        print(f"[profile] Wrote {path} (top {top} by cumulative time):")
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(top)
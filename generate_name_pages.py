@@ -5,35 +5,141 @@
 #  - Put a CSV at names.csv with header: name,meaning,origin,gender,traits,pronunciation
 #  - Edit SITE_URL below to your real site URL
 #  - Run: python generate_name_pages.py
+#  - Unchanged rows are skipped using .build-manifest.json; pass --force to re-render everything
+#  - The parsed CSV is cached under .catalogue-cache/ and reused until names.csv changes
+#  - Pass --deterministic (optionally --seed X) for byte-identical output from identical input
+#  - Pass --workers N (0 = all cores) to render name pages in a process pool
+#  - Sitemaps are sharded (sitemap-names-N.xml, sitemap-categories.xml) behind sitemap_index.xml;
+#    pass --sitemap-gzip to write .xml.gz shards
+#  - Pass --compress to write .gz/.br siblings of everything under public/
+#  - Pass --minify to strip insignificant whitespace and comments from generated HTML
+#  - Pass --api to also write a static JSON API under public/api/ (per-name documents, letter and
+#    category shards, and an api/index.json with counts)
+#  - Pass --stream to build huge CSVs in bounded memory (facet/sitemap lists spill to temp files;
+#    related names are off unless --related N is given, as their index is held in memory)
+#  - Pass --prune to delete generated pages and sitemap URLs the build no longer produces
+#    (--prune-dry-run only lists them)
+#  - Pass --only with a comma-separated subset of pages,index,search,categories,letters,sitemap,robots
+#    to run just those phases, e.g. --only categories,sitemap after a taxonomy tweak
+#  - Pass --watch to keep running and apply each saved names.csv edit to public/ (names_master.txt
+#    feeds auto_generate.py, which has its own --watch)
+#  - Importing this module has no side effects; call configure() to build from other paths
 
+import argparse
 import csv
+import gzip
+import hashlib
+import heapq
+import itertools
+import multiprocessing
 import json
 import html
 import os
+import posixpath
+import random
 import re
+import sqlite3
+import tempfile
+import time
+import unicodedata
+from fnmatch import fnmatchcase
 from pathlib import Path
 from datetime import datetime
-from random import choice, randint
-from collections import defaultdict
+from urllib.parse import unquote
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from build_metrics import metrics, profiled
+from html_minify import minify_html, print_report as print_minify_report
+from page_templates import Template, stylesheet_name, write_stylesheet
+from precompress import COMPRESSIBLE_SUFFIXES, compress_outputs, iter_compressible, print_report
+from auto_generate import slugify_name as master_slug
+from name_data import (cached_csv_rows, cached_master_names, csv_snapshot, diff_csv, file_digest, iter_csv_rows,
+                       name_key, set_snapshot_dir)
+from output_writer import DEFAULT_IO_WORKERS, shared_writer, write_atomic
+from related_names import RelatedIndex
+from structured_data import StructuredData
 
 # ---------------- CONFIG ----------------
 ROOT = Path(__file__).parent.resolve()
 PUBLIC_DIR = ROOT / "public"
 NAMES_DIR = PUBLIC_DIR / "names"
-SITEMAP_FILE = PUBLIC_DIR / "sitemap.xml"
+SITEMAP_INDEX_FILE = PUBLIC_DIR / "sitemap_index.xml"
+SITEMAP_FILE = PUBLIC_DIR / "sitemap.xml"  # legacy single-file sitemap, migrated into the shards
+SITEMAP_DB = ROOT / ".sitemap-state.sqlite3"
 ROBOTS_FILE = PUBLIC_DIR / "robots.txt"
+ASSETS_DIR = PUBLIC_DIR / "assets"
+SEARCH_DIR = PUBLIC_DIR / "search"
+API_DIR = PUBLIC_DIR / "api"
+CATEGORIES_DIR = PUBLIC_DIR / "categories"
 CSV_FILE = ROOT / "names.csv"
+MANIFEST_FILE = ROOT / ".build-manifest.json"
+# auto_generate.py, run from public/, also writes public/names/<slug>.html for these names.
+PUBLIC_MASTER_FILE = PUBLIC_DIR / "names_master.txt"
+REPORT_FILE = ROOT / ".build-report.json"
 
 # Change this to your Vercel URL (including https://)
 SITE_URL = "https://name-meaning-site.vercel.app"  # <-- SET YOUR SITE URL HERE
 SITE_NAME = "Name Meaning Finder"
 AUTHOR = SITE_NAME
 DEFAULT_LOCALE = "en-IN"
+# Sitemap protocol limits per file
+SITEMAP_MAX_URLS = 50000
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+# Typeahead shards are keyed by this many leading characters of the normalized name
+SEARCH_PREFIX_LEN = 2
+# Names per category page; bigger categories are split into numbered pages (0 = never split)
+CATEGORY_PAGE_SIZE = 200
+# Bump whenever build_html's markup changes so every page is re-rendered once.
+TEMPLATE_VERSION = "4"
+# --deterministic date when SOURCE_DATE_EPOCH is unset and names.csv has no lastmod values
+DEFAULT_SOURCE_DATE = "2025-01-01"
+
+# Generated output, relative to public/. With --prune, files and sitemap URLs matching these
+# patterns that the current build did not produce are removed, unless a hand-maintained top-level
+# page (index.html, about.html, ...) links to them or they match PRUNE_KEEP.
+PRUNE_PATTERNS = ("names/*.html", "categories/*.html", "names-*.html",
+                  "api/names/*.json", "api/categories/*.json", "api/letters/*.json")
+PRUNE_KEEP = ("names/google*.html",)  # search-console verification files
+# Build phases, in the order build() runs them; --only selects a subset.
+PHASES = ("pages", "index", "search", "categories", "letters", "sitemap", "robots")
 # ----------------------------------------
 
-# Ensure directories
-PUBLIC_DIR.mkdir(parents=True, exist_ok=True)
-NAMES_DIR.mkdir(parents=True, exist_ok=True)
+# The paths of the last configure() call, replayed in pool workers (they start from a fresh import).
+CONFIG_ARGS = (ROOT, None, None)
+
+def configure(root: Path = ROOT, public_dir: Path = None, csv_file: Path = None):
+    # Point every input, output and state path at another location, for callers that import this
+    # module (importing it touches no files; build() creates the output directories it needs).
+    # root holds names.csv and the build state (including .catalogue-cache/); public_dir defaults
+    # to root/public.
+    global PUBLIC_DIR, NAMES_DIR, SITEMAP_INDEX_FILE, SITEMAP_FILE, SITEMAP_DB, ROBOTS_FILE, ASSETS_DIR
+    global SEARCH_DIR, API_DIR, CATEGORIES_DIR, CSV_FILE, MANIFEST_FILE, PUBLIC_MASTER_FILE, REPORT_FILE
+    global CONFIG_ARGS
+    root = Path(root).resolve()
+    PUBLIC_DIR = Path(public_dir).resolve() if public_dir else root / "public"
+    NAMES_DIR = PUBLIC_DIR / "names"
+    SITEMAP_INDEX_FILE = PUBLIC_DIR / "sitemap_index.xml"
+    SITEMAP_FILE = PUBLIC_DIR / "sitemap.xml"
+    SITEMAP_DB = root / ".sitemap-state.sqlite3"
+    ROBOTS_FILE = PUBLIC_DIR / "robots.txt"
+    ASSETS_DIR = PUBLIC_DIR / "assets"
+    SEARCH_DIR = PUBLIC_DIR / "search"
+    API_DIR = PUBLIC_DIR / "api"
+    CATEGORIES_DIR = PUBLIC_DIR / "categories"
+    CSV_FILE = Path(csv_file).resolve() if csv_file else root / "names.csv"
+    MANIFEST_FILE = root / ".build-manifest.json"
+    PUBLIC_MASTER_FILE = PUBLIC_DIR / "names_master.txt"
+    REPORT_FILE = root / ".build-report.json"
+    set_snapshot_dir(root / ".catalogue-cache")
+    CONFIG_ARGS = (root, PUBLIC_DIR, CSV_FILE)
+
+def ensure_output_dirs(api=False):
+    for directory in (PUBLIC_DIR, NAMES_DIR, CATEGORIES_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+    if api:
+        for kind in ("names", "letters", "categories"):
+            (API_DIR / kind).mkdir(parents=True, exist_ok=True)
 
 # Helper utilities
 def slugify(text: str) -> str:
@@ -49,6 +155,15 @@ def slugify_simple(s: str) -> str:
 def safe_text(s: str) -> str:
     return html.escape((s or "").strip())
 
+def remove_output(path: Path, keep=()) -> bool:
+    # Delete a generated file together with the .gz/.br siblings --compress wrote for it (any
+    # listed in `keep` stay); True if the file itself existed.
+    existed = path.exists()
+    for variant in (path, path.with_name(path.name + ".gz"), path.with_name(path.name + ".br")):
+        if variant not in keep:
+            variant.unlink(missing_ok=True)
+    return existed
+
 # Small variety templates
 OPENING_TEMPLATES = [
     "The name {name} means {meaning}.",
@@ -75,38 +190,181 @@ DEFAULT_TRAITS = [
 ]
 
 # ---- Safe CSV reader ----
+def iter_csv(path: Path, cache=True):
+    # Yields one cleaned row dict at a time, from the parsed snapshot while the file is unchanged
+    # (see name_data.cached_csv_rows). cache=False always streams from the CSV itself.
+    return cached_csv_rows(path) if cache else iter_csv_rows(path)
+
 def read_csv(path: Path):
-    rows = []
-    if not path.exists():
-        print(f"ERROR: CSV file not found at {path}. Create a CSV with columns: name,meaning,origin,gender,traits,pronunciation")
-        return rows
-    with open(path, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            safe_row = {}
-            for k, v in (r.items()):
-                if k is None:
-                    continue
-                key = (k or "").strip().lower()
-                val = (v or "").strip()
-                safe_row[key] = val
-            # skip rows that are completely empty
-            if any(value for value in safe_row.values()):
-                rows.append(safe_row)
-    return rows
+    return list(iter_csv(path))
+
+# ---- Disk-backed sorted spool (bounded-memory aggregation) ----
+class SortedSpool:
+    # Multimap of key -> tuples, iterated back in sorted order. At most `run_size` entries are
+    # held in memory; beyond that, sorted runs spill to temp files and are merged on read.
+    # run_size=None keeps everything in memory.
+
+    def __init__(self, run_size=None):
+        self.run_size = run_size
+        self.counts = Counter()
+        self._buffers = defaultdict(list)
+        self._runs = defaultdict(list)
+        self._buffered = 0
+        self._tmpdir = None
+
+    def add(self, key, entry):
+        self._buffers[key].append(entry)
+        self.counts[key] += 1
+        self._buffered += 1
+        if self.run_size and self._buffered >= self.run_size:
+            self._spill()
+
+    def keys(self):
+        return list(self.counts)
+
+    def items(self, key):
+        streams = [self._read_run(p) for p in self._runs.get(key, [])]
+        streams.append(iter(sorted(self._buffers.get(key, []))))
+        return heapq.merge(*streams)
+
+    def close(self):
+        if self._tmpdir:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+    def _spill(self):
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="name-pages-")
+        for key, entries in self._buffers.items():
+            entries.sort()
+            path = Path(self._tmpdir.name) / f"run-{sum(map(len, self._runs.values()))}.jsonl"
+            with open(path, "w", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._runs[key].append(path)
+        self._buffers.clear()
+        self._buffered = 0
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                yield tuple(json.loads(line))
+
+# ---- Deterministic rendering ----
+def page_rng(slug: str, seed: str = ""):
+    # Stable per-page RNG: the same slug and seed always pick the same templates/traits.
+    digest = hashlib.sha256(f"{seed}:{slug}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+def source_date(path: Path = None, cache=True):
+    # Date taken from the input instead of the clock: SOURCE_DATE_EPOCH, else the newest lastmod
+    # in the CSV, else DEFAULT_SOURCE_DATE. Never file metadata: a fresh checkout of the same
+    # bytes must build the same output. cache=False (--stream) reads the CSV a row at a time
+    # instead of loading its parsed snapshot.
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch:
+        return datetime.utcfromtimestamp(int(epoch)).date()
+    fallback = datetime.strptime(DEFAULT_SOURCE_DATE, "%Y-%m-%d").date()
+    path = path or CSV_FILE
+    rows = iter_csv(path, cache) if path.exists() else iter(())
+    first = next(rows, None)
+    if first is None or "lastmod" not in first:
+        return fallback
+    dates = (row_date(row, None) for row in itertools.chain([first], rows))
+    return max((d for d in dates if d), default=fallback)
+
+def row_date(row, default):
+    # An optional lastmod column (YYYY-MM-DD) overrides the build-wide date.
+    value = (row.get("lastmod") or "").strip()
+    if value:
+        try:
+            return datetime.strptime(value[:10], "%Y-%m-%d").date()
+        except ValueError:
+            pass
+    return default
 
 # ---- Page generation ----
-def generate_description(row):
+STRUCTURED_DATA = StructuredData(SITE_URL, AUTHOR, DEFAULT_LOCALE)
+
+# Shared by every name page; written once to public/assets/ under a content-hashed name.
+NAME_PAGE_CSS = """body{font-family: system-ui,-apple-system,Segoe UI,Roboto,'Helvetica Neue',Arial;max-width:820px;margin:28px auto;padding:0 18px;color:#111;line-height:1.6}
+header h1{font-size:28px;margin:8px 0 4px}
+.meta{color:#666;font-size:14px;margin-bottom:14px}
+.content p{margin:0 0 14px}
+footer{margin-top:36px;font-size:13px;color:#666}
+a.button{display:inline-block;padding:8px 12px;border-radius:6px;border:1px solid #ddd;text-decoration:none;color:inherit}
+"""
+NAME_PAGE_STYLESHEET = stylesheet_name(NAME_PAGE_CSS, "names")
+
+# Compiled once at import; site-wide values are bound up front so each page only fills its own slots.
+NAME_PAGE_TEMPLATE = Template("""<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8" />
+  <meta name="viewport" content="width=device-width,initial-scale=1" />
+  <title>{{title}}</title>
+  <meta name="description" content="{{meta_desc}}" />
+  <link rel="canonical" href="{{page_url}}" />
+  <meta property="og:type" content="article" />
+  <meta property="og:site_name" content="{{site_name}}" />
+  <meta property="og:title" content="{{title}}" />
+  <meta property="og:description" content="{{meta_desc}}" />
+  <meta property="og:url" content="{{page_url}}" />
+  <meta property="og:image" content="{{og_image}}" />
+  <meta name="twitter:card" content="summary_large_image" />
+  <meta name="twitter:title" content="{{title}}" />
+  <meta name="twitter:description" content="{{meta_desc}}" />
+  {{json_ld}}
+  <link rel="stylesheet" href="{{stylesheet_url}}" />
+</head>
+<body>
+  <header>
+    <a href="{{site_url}}" class="button">← Home</a>
+    <h1>{{name}}</h1>
+    <div class="meta">Meaning: <strong>{{meaning}}</strong> • Origin: {{origin}} • Pronunciation: {{pronunciation}}</div>
+  </header>
+  <main class="content">
+    {{description_html}}
+    {{cat_links_html}}
+    {{related_html}}
+    <h3>Quick facts</h3>
+    <ul>
+      <li><strong>Name:</strong> {{name}}</li>
+      <li><strong>Meaning:</strong> {{meaning}}</li>
+      <li><strong>Origin:</strong> {{origin}}</li>
+      <li><strong>URL:</strong> <a href="{{page_url}}">{{page_url}}</a></li>
+    </ul>
+  </main>
+  <footer>
+    <p>© {{year}} {{site_name}} — <a href="{{site_url}}/privacy">Privacy</a> • <a href="{{site_url}}/contact">Contact</a></p>
+  </footer>
+</body>
+</html>
+""").bind(
+    site_url=SITE_URL,
+    site_name=safe_text(SITE_NAME),
+    og_image=f"{SITE_URL}/og-default.png",
+    stylesheet_url=f"{SITE_URL}/assets/{NAME_PAGE_STYLESHEET}",
+)
+# Part of every row_digest: editing the markup, the phrases or the CSS (its fingerprinted name is
+# bound into the markup) re-renders the pages even without a TEMPLATE_VERSION bump.
+TEMPLATE_DIGEST = hashlib.sha256(json.dumps(
+    [NAME_PAGE_TEMPLATE.literals, OPENING_TEMPLATES, ORIGIN_TEMPLATES, PERSONALITY_TEMPLATES, DEFAULT_TRAITS],
+    ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def generate_description(row, rng=None):
+    rng = rng or random
     name = row.get("name", "").strip()
     meaning = row.get("meaning", "").strip() or "Meaning not available"
     origin = row.get("origin", "").strip() or "Unknown origin"
     gender = row.get("gender", "").strip()
-    traits = row.get("traits", "").strip() or choice(DEFAULT_TRAITS)
+    traits = row.get("traits", "").strip() or rng.choice(DEFAULT_TRAITS)
 
     parts = []
-    parts.append(OPENING_TEMPLATES[randint(0, len(OPENING_TEMPLATES)-1)].format(name=name, meaning=meaning))
-    parts.append(ORIGIN_TEMPLATES[randint(0, len(ORIGIN_TEMPLATES)-1)].format(origin=origin))
-    parts.append(PERSONALITY_TEMPLATES[randint(0, len(PERSONALITY_TEMPLATES)-1)].format(name=name, traits=traits))
+    parts.append(OPENING_TEMPLATES[rng.randint(0, len(OPENING_TEMPLATES)-1)].format(name=name, meaning=meaning))
+    parts.append(ORIGIN_TEMPLATES[rng.randint(0, len(ORIGIN_TEMPLATES)-1)].format(origin=origin))
+    parts.append(PERSONALITY_TEMPLATES[rng.randint(0, len(PERSONALITY_TEMPLATES)-1)].format(name=name, traits=traits))
     if row.get("pronunciation"):
         parts.append(f"Pronunciation: {row.get('pronunciation')}.")
     if row.get("popularity"):
@@ -116,15 +374,27 @@ def generate_description(row):
     paragraphs = "".join(f"<p>{safe_text(p)}</p>" for p in parts)
     return paragraphs
 
-def build_html(row):
+def category_links(name: str, gender: str, origin: str):
+    # (label, url) of the gender, origin and length category pages a name page links to.
+    length = length_label(name)
+    return [
+        (gender, f"{SITE_URL}/categories/{slugify_simple(gender)}.html"),
+        (origin, f"{SITE_URL}/categories/origin-{slugify_simple(origin)}.html"),
+        (length, f"{SITE_URL}/categories/length-{slugify_simple(length)}.html"),
+    ]
+
+def build_html(row, rng=None, today=None, related=()):
+    # related: [(name, slug), ...] from RelatedIndex, rendered as internal links.
     name = (row.get("name") or "").strip()
     if not name:
         return None
     slug = slugify(name)
+    rng = rng or random
+    today = today or datetime.utcnow().date()
     meaning = row.get("meaning", "").strip() or "Meaning not available"
     origin = row.get("origin", "").strip() or "Unknown"
     gender = (row.get("gender") or "").strip().capitalize() or "Unspecified"
-    traits = row.get("traits", "").strip() or choice(DEFAULT_TRAITS)
+    traits = row.get("traits", "").strip() or rng.choice(DEFAULT_TRAITS)
     pronunciation = (row.get("pronunciation") or "").strip()
 
     # Meta title + description (kept concise and SEO-friendly)
@@ -137,327 +407,1485 @@ def build_html(row):
         meta_desc = meta_desc_short
 
     page_url = f"{SITE_URL}/names/{slug}.html"
-    lastmod = datetime.utcnow().date().isoformat()
-
-    # richer JSON-LD: WebPage + DefinedTerm + BreadcrumbList
-    jsonld_obj = {
-        "@context": "https://schema.org",
-        "@graph": [
-            {
-                "@type": "WebPage",
-                "@id": page_url,
-                "name": name,
-                "description": re.sub(r"\s+", " ", meaning)[:197],
-                "url": page_url,
-                "inLanguage": DEFAULT_LOCALE,
-                "author": {"@type": "Organization", "name": AUTHOR}
-            },
-            {
-                "@type": "DefinedTerm",
-                "name": name,
-                "description": meaning,
-                "inDefinedTermSet": SITE_URL
-            },
-            {
-                "@type": "BreadcrumbList",
-                "itemListElement": [
-                    {"@type": "ListItem", "position": 1, "name": "Home", "item": SITE_URL + "/"},
-                    {"@type": "ListItem", "position": 2, "name": "Names", "item": SITE_URL + "/names/"},
-                    {"@type": "ListItem", "position": 3, "name": name, "item": page_url}
-                ]
-            }
-        ]
-    }
-    # produce valid JSON-LD (raw JSON, not HTML-escaped)
-    json_ld = json.dumps(jsonld_obj, ensure_ascii=False, indent=2)
-    json_ld_block = f'<script type="application/ld+json">\n{json_ld}\n</script>'
+    lastmod = today.isoformat()
 
-    # Small internal links to categories (gender + origin + length)
-    gender_slug = slugify_simple(gender)
-    origin_slug = slugify_simple(origin)
-    nlen = len(name.replace(" ", ""))
-    if nlen <= 4:
-        length_label = "Short (1-4)"
-    elif nlen <= 7:
-        length_label = "Medium (5-7)"
-    else:
-        length_label = "Long (8+)"
-    length_slug = slugify_simple(length_label)
+    # richer JSON-LD: WebPage + DefinedTerm + BreadcrumbList, one minified block
+    json_ld = STRUCTURED_DATA.name_page(name, page_url, re.sub(r"\s+", " ", meaning)[:197], meaning)
 
-    # Category URLs
-    cat_gender_url = f"{SITE_URL}/categories/{gender_slug}.html"
-    cat_origin_url = f"{SITE_URL}/categories/origin-{origin_slug}.html"
-    cat_length_url = f"{SITE_URL}/categories/length-{length_slug}.html"
+    # Small internal links to categories (gender + origin + length)
+    (_, cat_gender_url), (_, cat_origin_url), (_, cat_length_url) = category_links(name, gender, origin)
 
     # Build content HTML
-    description_html = generate_description(row)
+    description_html = generate_description(row, rng)
+    related_html = ""
+    if related:
+        links = ", ".join(f'<a href="{SITE_URL}/names/{r_slug}.html">{safe_text(r_name)}</a>' for r_name, r_slug in related)
+        related_html = f'<h3>Related names</h3>\n    <p>{links}</p>'
     cat_links_html = f'''
     <p>Categories:
       <a href="{cat_gender_url}">{html.escape(gender)}</a> |
       <a href="{cat_origin_url}">{html.escape(origin)}</a> |
-      <a href="{cat_length_url}">{html.escape(length_label)}</a>
+      <a href="{cat_length_url}">{html.escape(length_label(name))}</a>
     </p>
     '''
 
-    og_image = f"{SITE_URL}/og-default.png"
+    html_page = NAME_PAGE_TEMPLATE.render(
+        title=safe_text(title),
+        meta_desc=safe_text(meta_desc),
+        page_url=page_url,
+        json_ld=json_ld,
+        name=safe_text(name),
+        meaning=safe_text(meaning),
+        origin=safe_text(origin),
+        pronunciation=safe_text(pronunciation),
+        description_html=description_html,
+        cat_links_html=cat_links_html,
+        related_html=related_html,
+        year=str(today.year),
+    )
+    return slug, html_page, lastmod
 
-    html_template = f"""<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8" />
-  <meta name="viewport" content="width=device-width,initial-scale=1" />
-  <title>{safe_text(title)}</title>
-  <meta name="description" content="{safe_text(meta_desc)}" />
-  <link rel="canonical" href="{page_url}" />
-  <meta property="og:type" content="article" />
-  <meta property="og:site_name" content="{safe_text(SITE_NAME)}" />
-  <meta property="og:title" content="{safe_text(title)}" />
-  <meta property="og:description" content="{safe_text(meta_desc)}" />
-  <meta property="og:url" content="{page_url}" />
-  <meta property="og:image" content="{og_image}" />
-  <meta name="twitter:card" content="summary_large_image" />
-  <meta name="twitter:title" content="{safe_text(title)}" />
-  <meta name="twitter:description" content="{safe_text(meta_desc)}" />
-{json_ld_block}
-{html.escape(str(jsonld_obj)).replace("&quot;", '"')}
-  </script>
-  <style>
-    body{{font-family: system-ui,-apple-system,Segoe UI,Roboto,'Helvetica Neue',Arial;max-width:820px;margin:28px auto;padding:0 18px;color:#111;line-height:1.6}}
-    header h1{{font-size:28px;margin:8px 0 4px}}
-    .meta{{color:#666;font-size:14px;margin-bottom:14px}}
-    .content p{{margin:0 0 14px}}
-    footer{{margin-top:36px;font-size:13px;color:#666}}
-    a.button{{display:inline-block;padding:8px 12px;border-radius:6px;border:1px solid #ddd;text-decoration:none;color:inherit}}
-  </style>
-</head>
-<body>
-  <header>
-    <a href="{SITE_URL}" class="button">← Home</a>
-    <h1>{safe_text(name)}</h1>
-    <div class="meta">Meaning: <strong>{safe_text(meaning)}</strong> • Origin: {safe_text(origin)} • Pronunciation: {safe_text(pronunciation)}</div>
-  </header>
-  <main class="content">
-    {description_html}
-    {cat_links_html}
-    <h3>Quick facts</h3>
-    <ul>
-      <li><strong>Name:</strong> {safe_text(name)}</li>
-      <li><strong>Meaning:</strong> {safe_text(meaning)}</li>
-      <li><strong>Origin:</strong> {safe_text(origin)}</li>
-      <li><strong>URL:</strong> <a href="{page_url}">{page_url}</a></li>
-    </ul>
-  </main>
-  <footer>
-    <p>© {datetime.utcnow().year} {safe_text(SITE_NAME)} — <a href="{SITE_URL}/privacy">Privacy</a> • <a href="{SITE_URL}/contact">Contact</a></p>
-  </footer>
-</body>
-</html>
-"""
-    return slug, html_template, lastmod
+# ---- Build manifest (incremental rebuilds) ----
+def row_digest(row, mode="", related=(), today=None):
+    # Everything build_html reads: the row itself, its related names and the template/config it
+    # is rendered with. `mode` distinguishes random from deterministic (seeded) builds; the latter
+    # also depend on the page's date (footer year, lastmod), which comes from the input.
+    dated = row_date(row, today).isoformat() if mode.startswith("deterministic") and today else None
+    payload = json.dumps(
+        [TEMPLATE_VERSION, TEMPLATE_DIGEST, SITE_URL, SITE_NAME, AUTHOR, DEFAULT_LOCALE, mode, sorted(row.items()),
+         related, dated],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def load_manifest(path: Path):
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        print(f"[manifest] Could not read {path}; doing a full rebuild")
+        return {}
+    if data.get("template_version") != TEMPLATE_VERSION:
+        return {}
+    return data.get("pages", {})
+
+def save_manifest(path: Path, pages: dict):
+    data = {"template_version": TEMPLATE_VERSION, "pages": pages}
+    tmp = path.with_name(path.name + ".tmp")
+    # Compact: json's indent= path is pure Python, too slow once entries carry related names.
+    tmp.write_text(json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")), encoding='utf-8')
+    os.replace(tmp, path)
 
 # ---- Sitemap & robots ----
-def update_sitemap(add_entries):
-    existing = {}
-    if SITEMAP_FILE.exists():
-        txt = SITEMAP_FILE.read_text(encoding='utf-8')
-        blocks = re.findall(r"<url>(.*?)</url>", txt, flags=re.S)
-        for b in blocks:
-            mloc = re.search(r"<loc>(.*?)</loc>", b)
-            mlast = re.search(r"<lastmod>(.*?)</lastmod>", b)
-            if mloc:
-                existing[mloc.group(1).strip()] = mlast.group(1).strip() if mlast else ""
-    # merge
-    for url, lastmod in add_entries.items():
-        existing[url] = lastmod
-    items = []
-    for loc, last in sorted(existing.items()):
-        items.append(f"""  <url>
+SITEMAP_XML_HEAD = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+SITEMAP_XML_FOOT = "</urlset>\n"
+
+def _open_text(path: Path, mode="r"):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "t", encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def iter_sitemap_entries(path: Path, chunk_size: int = 1 << 20):
+    # Yields (loc, lastmod) from an existing (optionally gzipped) sitemap without loading it whole.
+    if not path.exists():
+        return
+    buf = ""
+    with _open_text(path) as f:
+        while True:
+            data = f.read(chunk_size)
+            buf += data
+            end = 0
+            for block in re.finditer(r"<url>(.*?)</url>", buf, flags=re.S):
+                end = block.end()
+                mloc = re.search(r"<loc>(.*?)</loc>", block.group(1))
+                mlast = re.search(r"<lastmod>(.*?)</lastmod>", block.group(1))
+                if mloc:
+                    yield mloc.group(1).strip(), mlast.group(1).strip() if mlast else ""
+            buf = buf[end:]
+            if not data:
+                break
+
+def sitemap_shard_files():
+    # Every sharded sitemap currently on disk, plain or gzipped.
+    return sorted(p for pattern in ("sitemap-*.xml", "sitemap-*.xml.gz") for p in PUBLIC_DIR.glob(pattern))
+
+def sitemap_kind(url: str) -> str:
+    return "categories" if "/categories/" in url else "names"
+
+def sitemap_shard_name(kind: str, shard: int, gzip_output=False) -> str:
+    if kind == "categories":
+        base = "sitemap-categories" if shard == 1 else f"sitemap-categories-{shard}"
+    else:
+        base = f"sitemap-{kind}-{shard}"
+    return base + (".xml.gz" if gzip_output else ".xml")
+
+def sitemap_entry(loc, lastmod, changefreq="monthly", priority=0.6) -> str:
+    return f"""  <url>
     <loc>{loc}</loc>
-    <lastmod>{last or datetime.utcnow().date().isoformat()}</lastmod>
-    <changefreq>monthly</changefreq>
-    <priority>0.6</priority>
-  </url>""")
-    sitemap_content = "<?xml version=\"1.0\" encoding=\"UTF-8\"?>\n" \
-                      "<urlset xmlns=\"http://www.sitemaps.org/schemas/sitemap/0.9\">\n" + "\n".join(items) + "\n</urlset>\n"
-    SITEMAP_FILE.write_text(sitemap_content, encoding='utf-8')
-    print(f"[sitemap] Updated {SITEMAP_FILE} with {len(items)} URLs")
+    <lastmod>{lastmod}</lastmod>
+    <changefreq>{changefreq}</changefreq>
+    <priority>{priority}</priority>
+  </url>
+"""
+
+class SitemapStore:
+    # Persistent URL -> lastmod/changefreq/priority state in SQLite. Every URL is pinned to a
+    # shard when first seen, so an upsert only dirties the shards it touches and only those
+    # sitemap files get rewritten.
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS urls (
+        loc TEXT PRIMARY KEY,
+        kind TEXT NOT NULL,
+        shard INTEGER NOT NULL,
+        lastmod TEXT NOT NULL,
+        changefreq TEXT NOT NULL DEFAULT 'monthly',
+        priority REAL NOT NULL DEFAULT 0.6
+    );
+    CREATE INDEX IF NOT EXISTS urls_by_shard ON urls (kind, shard, loc);
+    CREATE TABLE IF NOT EXISTS shards (
+        kind TEXT NOT NULL,
+        shard INTEGER NOT NULL,
+        url_count INTEGER NOT NULL DEFAULT 0,
+        byte_count INTEGER NOT NULL DEFAULT 0,
+        newest TEXT NOT NULL DEFAULT '',
+        dirty INTEGER NOT NULL DEFAULT 1,
+        PRIMARY KEY (kind, shard)
+    );
+    CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+    def get_meta(self, key, default=""):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def upsert(self, entries, keep_newer=False):
+        # entries: iterable of (loc, lastmod). Returns how many URLs were added or changed.
+        # keep_newer=True never moves a stored lastmod backwards (used when importing old files).
+        conn = self.conn
+        changed = 0
+        for loc, lastmod in entries:
+            row = conn.execute("SELECT kind, shard, lastmod FROM urls WHERE loc = ?", (loc,)).fetchone()
+            if row:
+                kind, shard, stored = row
+                if stored == lastmod or (keep_newer and stored >= lastmod):
+                    continue
+                conn.execute("UPDATE urls SET lastmod = ? WHERE loc = ?", (lastmod, loc))
+                conn.execute("UPDATE shards SET dirty = 1 WHERE kind = ? AND shard = ?", (kind, shard))
+            else:
+                kind = sitemap_kind(loc)
+                size = len(sitemap_entry(loc, lastmod).encode("utf-8"))
+                shard = self._shard_with_room(kind, size)
+                conn.execute("INSERT INTO urls (loc, kind, shard, lastmod) VALUES (?, ?, ?, ?)",
+                             (loc, kind, shard, lastmod))
+                conn.execute("UPDATE shards SET url_count = url_count + 1, byte_count = byte_count + ?, dirty = 1 "
+                             "WHERE kind = ? AND shard = ?", (size, kind, shard))
+            changed += 1
+        return changed
+
+    def _shard_with_room(self, kind, size):
+        row = self.conn.execute("SELECT shard, url_count, byte_count FROM shards WHERE kind = ? "
+                                "ORDER BY shard DESC LIMIT 1", (kind,)).fetchone()
+        overhead = len(SITEMAP_XML_HEAD) + len(SITEMAP_XML_FOOT)
+        if row and row[1] < SITEMAP_MAX_URLS and row[2] + size + overhead <= SITEMAP_MAX_BYTES:
+            return row[0]
+        shard = row[0] + 1 if row else 1
+        self.conn.execute("INSERT INTO shards (kind, shard) VALUES (?, ?)", (kind, shard))
+        return shard
+
+    def delete(self, locs):
+        # Drop URLs (pages that no longer exist). Returns how many were stored.
+        conn = self.conn
+        removed = 0
+        for loc in locs:
+            row = conn.execute("SELECT kind, shard, lastmod FROM urls WHERE loc = ?", (loc,)).fetchone()
+            if not row:
+                continue
+            kind, shard, lastmod = row
+            size = len(sitemap_entry(loc, lastmod).encode("utf-8"))
+            conn.execute("DELETE FROM urls WHERE loc = ?", (loc,))
+            conn.execute("UPDATE shards SET url_count = url_count - 1, byte_count = byte_count - ?, dirty = 1 "
+                         "WHERE kind = ? AND shard = ?", (size, kind, shard))
+            removed += 1
+        return removed
+
+    def locs(self):
+        return (loc for (loc,) in self.conn.execute("SELECT loc FROM urls ORDER BY loc"))
+
+    def mark_all_dirty(self):
+        self.conn.execute("UPDATE shards SET dirty = 1")
+
+    def shards(self):
+        return self.conn.execute("SELECT kind, shard, url_count, newest, dirty FROM shards "
+                                 "WHERE url_count > 0 ORDER BY kind DESC, shard").fetchall()
+
+    def shard_entries(self, kind, shard):
+        return self.conn.execute("SELECT loc, lastmod, changefreq, priority FROM urls "
+                                 "WHERE kind = ? AND shard = ? ORDER BY loc", (kind, shard))
+
+    def mark_written(self, kind, shard, newest):
+        self.conn.execute("UPDATE shards SET dirty = 0, newest = ? WHERE kind = ? AND shard = ?",
+                          (newest, kind, shard))
+
+def write_sitemap_shard(store: SitemapStore, kind: str, shard: int, gzip_output=False):
+    # Regenerate one shard file from the store; entries are streamed, never joined in memory.
+    path = PUBLIC_DIR / sitemap_shard_name(kind, shard, gzip_output)
+    tmp = path.with_name(path.name + ".tmp")
+    newest = ""
+    # mtime=0 keeps gzip output byte-identical across runs
+    with (gzip.GzipFile(tmp, "wb", mtime=0) if gzip_output else open(tmp, "wb")) as f:
+        f.write(SITEMAP_XML_HEAD.encode("utf-8"))
+        for loc, lastmod, changefreq, priority in store.shard_entries(kind, shard):
+            f.write(sitemap_entry(loc, lastmod, changefreq, priority).encode("utf-8"))
+            newest = max(newest, lastmod)
+        f.write(SITEMAP_XML_FOOT.encode("utf-8"))
+    os.replace(tmp, path)
+    store.mark_written(kind, shard, newest)
+    return path
+
+def render_sitemap_index(shard_rows, today, gzip_output=False) -> str:
+    # shard_rows: (kind, shard, count, newest_lastmod, dirty) as returned by SitemapStore.shards().
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for kind, shard, _count, newest, _dirty in shard_rows:
+        name = sitemap_shard_name(kind, shard, gzip_output)
+        lines.append(f"  <sitemap>\n    <loc>{SITE_URL}/{name}</loc>\n"
+                     f"    <lastmod>{newest or today.isoformat()}</lastmod>\n  </sitemap>")
+    lines.append("</sitemapindex>\n")
+    return "\n".join(lines)
+
+def write_sitemap_index(shard_rows, today, gzip_output=False):
+    write_atomic(SITEMAP_INDEX_FILE, render_sitemap_index(shard_rows, today, gzip_output).encode("utf-8"))
+
+def update_sitemap(add_entries, today=None, gzip_output=False, remove=()):
+    # add_entries: a {url: lastmod} dict or any iterable of (url, lastmod) pairs; passing only
+    # the URLs that changed is enough. They are upserted into SITEMAP_DB (and the `remove` URLs
+    # deleted from it) and only the shards holding changed URLs are rewritten;
+    # sitemap_index.xml lists all shards.
+    today = today or datetime.utcnow().date()
+    if hasattr(add_entries, "items"):
+        add_entries = add_entries.items()
+    store = SitemapStore(SITEMAP_DB)
+    if store.get_meta("imported") != "1":
+        # First run against this store: import whatever sitemaps are already deployed. The flag is
+        # committed in the same transaction as the imported URLs, so an interrupted run (which
+        # leaves the schema behind) imports again instead of deleting sitemap.xml unread.
+        for path in [SITEMAP_FILE] + sitemap_shard_files():
+            store.upsert(((loc, last or today.isoformat()) for loc, last in iter_sitemap_entries(path)),
+                         keep_newer=True)
+        store.set_meta("imported", "1")
+        store.conn.commit()
+    gzipped_before = store.get_meta("gzip", "0") == "1"
+    if gzipped_before != gzip_output:
+        store.mark_all_dirty()
+        store.set_meta("gzip", str(int(gzip_output)))
+    changed = store.upsert((url, lastmod or today.isoformat()) for url, lastmod in add_entries)
+    changed += store.delete(remove)
+
+    shard_rows = store.shards()
+    rewritten = 0
+    keep = set()
+    for kind, shard, _count, _newest, dirty in shard_rows:
+        path = PUBLIC_DIR / sitemap_shard_name(kind, shard, gzip_output)
+        keep.add(path)
+        if dirty or not path.exists():
+            write_sitemap_shard(store, kind, shard, gzip_output)
+            rewritten += 1
+    shard_rows = store.shards()
+    write_sitemap_index(shard_rows, today, gzip_output)
+    store.close()
+
+    # Drop shards the index no longer references (e.g. gzip toggled) and the legacy single-file
+    # sitemap.xml, whose entries now live in the store, with their --compress siblings. A .xml.gz
+    # next to a live plain shard is such a sibling, unless the last run wrote gzipped shards.
+    for path in sitemap_shard_files() + [SITEMAP_FILE]:
+        if path in keep or (path.with_suffix("") in keep and not gzipped_before):
+            continue
+        remove_output(path, keep)
+    total = sum(count for _kind, _shard, count, _newest, _dirty in shard_rows)
+    print(f"[sitemap] {changed} URL(s) changed; rewrote {rewritten} of {len(shard_rows)} shard(s) "
+          f"({total} URLs); index at {SITEMAP_INDEX_FILE}")
 
 def ensure_robots():
+    # Point robots.txt at the sitemap index, replacing any older Sitemap line.
+    sitemap_line = f"Sitemap: {SITE_URL}/{SITEMAP_INDEX_FILE.name}"
     content = ROBOTS_FILE.read_text(encoding='utf-8') if ROBOTS_FILE.exists() else ""
+    if sitemap_line in content.splitlines():
+        print("[robots] robots.txt already points at the sitemap index (left unchanged)")
+        return
     if "Sitemap:" not in content:
-        content = f"User-agent: *\nAllow: /\nSitemap: {SITE_URL}/sitemap.xml\n"
-        ROBOTS_FILE.write_text(content, encoding='utf-8')
-        print(f"[robots] Wrote {ROBOTS_FILE}")
+        content = f"User-agent: *\nAllow: /\n{sitemap_line}\n"
     else:
-        print("[robots] robots.txt already contains Sitemap line (left unchanged)")
+        lines = [l for l in content.splitlines() if not l.startswith("Sitemap:")]
+        content = "\n".join(lines + [sitemap_line]) + "\n"
+    ROBOTS_FILE.write_text(content, encoding='utf-8')
+    print(f"[robots] Wrote {ROBOTS_FILE}")
+
+# ---- Search index (homepage typeahead) ----
+# public/index.html mirrors search_key() and search_shard_name() in JavaScript; keep them in sync.
+def search_key(name: str) -> str:
+    # Case- and accent-insensitive key: NFKD, drop combining marks, keep letters/digits, casefold.
+    decomposed = unicodedata.normalize("NFKD", name)
+    return "".join(c for c in decomposed if c.isalnum() and not unicodedata.combining(c)).casefold()
+
+def search_shard_name(prefix: str) -> str:
+    # ASCII letters/digits stay as-is; anything else becomes -<hex codepoint>.
+    return "".join(c if c.isascii() and c.isalnum() else f"-{ord(c):x}" for c in prefix)
+
+def master_search_entries(csv_slugs):
+    # (prefix, (key, name, slug, "")) for the pages auto_generate.py publishes from
+    # public/names_master.txt, except names a names.csv row already has a page for.
+    for name in cached_master_names(PUBLIC_MASTER_FILE):
+        name = name.strip()
+        slug, key = master_slug(name), search_key(name)
+        if key and slug not in csv_slugs and slugify(name) not in csv_slugs:
+            yield key[:SEARCH_PREFIX_LEN], (key, name, slug, "")
+
+def write_search_index(entries: SortedSpool, prune=True):
+    # `entries` is keyed by prefix and holds (key, name, slug, meaning) tuples. Each prefix becomes
+    # one compact JSON shard of [name, slug, meaning] triples; unchanged shards are not rewritten.
+    # prune=False leaves shards for prefixes not in `entries` alone (partial updates).
+    SEARCH_DIR.mkdir(parents=True, exist_ok=True)
+    writer = shared_writer()
+    futures = []
+    keep = set()
+    for prefix in entries.keys():
+        path = SEARCH_DIR / f"{search_shard_name(prefix)}.json"
+        keep.add(path)
+        items = [[name, slug, meaning] for _key, name, slug, meaning in entries.items(prefix)]
+        futures.append(writer.write(path, json.dumps(items, ensure_ascii=False, separators=(",", ":")), "write_search"))
+    written = sum(1 for future in futures if future.result()[1])
+    # Shards for vanished prefixes go, and so do their .gz/.br siblings (orphaned ones included).
+    for path in SEARCH_DIR.iterdir() if prune else ():
+        shard = path.with_suffix("") if path.suffix in (".gz", ".br") else path
+        if shard.suffix == ".json" and shard not in keep:
+            path.unlink()
+    print(f"[search] {len(keep)} prefix shard(s) in {SEARCH_DIR} ({written} rewritten)")
 
 # ---- Names index ----
-def generate_index_page(pages):
-    rows_html = "\n".join(f'<li><a href="{url}">{html.escape(title)}</a></li>' for url,title in pages)
-    index_html = f"""<!doctype html>
+def generate_index_page(pages, minify=False):
+    # `pages` may be a generator; entries are written as they arrive. The page is streamed, so
+    # --minify is applied to the head and foot, and the list items are simply not separated.
+    # The bytes are hashed on the way out and an identical existing file is left untouched.
+    head, foot = INDEX_PAGE_TEMPLATE.split("{rows_html}")
+    head, foot = head.format(site_name=safe_text(SITE_NAME)), foot.format(site_url=SITE_URL)
+    separator = "\n"
+    if minify:
+        size = len(head.encode("utf-8")) + len(foot.encode("utf-8"))
+        head, foot, separator = minify_html(head), minify_html(foot), ""
+        saved = size - len(head.encode("utf-8")) - len(foot.encode("utf-8"))
+    count = 0
+    out = NAMES_DIR / "index.html"
+    tmp = out.with_name(out.name + ".tmp")
+    digest = hashlib.sha256()
+    with open(tmp, "wb") as f:
+        def emit(text):
+            data = text.encode("utf-8")
+            digest.update(data)
+            f.write(data)
+        emit(head)
+        for url, title in pages:
+            emit((separator if count else "") + f'<li><a href="{url}">{html.escape(title)}</a></li>')
+            count += 1
+        emit(foot)
+    size = tmp.stat().st_size
+    if minify:
+        saved += max(0, count - 1)
+        metrics.count("minify_bytes_in", size + saved)
+        metrics.count("minify_bytes_out", size)
+    if out.exists() and out.stat().st_size == size and file_digest(out) == digest.hexdigest():
+        tmp.unlink()
+        metrics.count("files_skipped")
+        print(f"[index] Index with {count} entries unchanged at {out}")
+        return
+    os.replace(tmp, out)
+    print(f"[index] Wrote index with {count} entries to {out}")
+
+INDEX_PAGE_TEMPLATE = """<!doctype html>
 <html lang="en"><head>
 <meta charset="utf-8" />
 <meta name="viewport" content="width=device-width,initial-scale=1" />
-<title>Names index — {safe_text(SITE_NAME)}</title>
+<title>Names index — {site_name}</title>
 <meta name="description" content="Index of generated name meaning pages" />
 </head><body>
 <h1>Names index</h1>
 <ul>
 {rows_html}
 </ul>
-<p><a href="{SITE_URL}">Back to Home</a></p>
+<p><a href="{site_url}">Back to Home</a></p>
 </body></html>"""
-    (NAMES_DIR / "index.html").write_text(index_html, encoding='utf-8')
-    print(f"[index] Wrote index with {len(pages)} entries to {NAMES_DIR / 'index.html'}")
 
 # ---- Category generation (auto) ----
-CATEGORIES_DIR = PUBLIC_DIR / "categories"
-CATEGORIES_DIR.mkdir(parents=True, exist_ok=True)
 
 def write_html(path: Path, html_str: str):
-    path.write_text(html_str, encoding='utf-8')
-    print(f"[write] {path.relative_to(ROOT)}")
+    # Queued on the shared writer: atomic, and skipped when the file already holds these bytes.
+    # Returns the write's future, resolving to (existed, written).
+    def log_write(future):
+        if not future.exception() and future.result()[1]:
+            metrics.log(f"[write] {path.relative_to(PUBLIC_DIR.parent)}")
 
-def render_category_page(title: str, description: str, items: list):
-    rows = "\n".join(f'<li><a href="{u}">{html.escape(l)}</a></li>' for u,l in items)
-    return f"""<!doctype html>
+    future = shared_writer().write(path, html_str, "write_listing")
+    future.add_done_callback(log_write)
+    return future
+
+CATEGORY_PAGE_TEMPLATE = """<!doctype html>
 <html lang="en"><head>
 <meta charset="utf-8"/>
 <meta name="viewport" content="width=device-width,initial-scale=1"/>
-<title>{html.escape(title)}</title>
-<meta name="description" content="{html.escape(description)}"/>
+<title>{title}</title>
+<meta name="description" content="{description}"/>
+{pagination_head}{json_ld}
 </head><body>
-<header><a href="{SITE_URL}">Home</a> › <strong>{html.escape(title)}</strong></header>
+<header><a href="{site_url}">Home</a> › <strong>{title}</strong></header>
+<main>
+<h1>{title}</h1>
+<p>{description}</p>
+<ul>
+{rows}
+</ul>
+{pagination_nav}<p><a href="{site_url}/categories/index.html">All categories</a></p>
+</main>
+<footer>© {year} {site_name}</footer>
+</body></html>"""
+
+def page_file_name(slug: str, page: int = 1) -> str:
+    # Page 1 keeps the historical URL; later pages get a -page-N suffix.
+    return f"{slug}.html" if page == 1 else f"{slug}-page-{page}.html"
+
+def remove_stale_pages(directory: Path, slug: str, pages: int, suffix: str = ".html"):
+    # Drop <slug>-page-N.html files left over from when a listing had more than `pages` pages,
+    # and their .gz/.br siblings.
+    stale = re.compile(re.escape(slug) + r"-page-(\d+)" + re.escape(suffix) + r"(?:\.gz|\.br)?")
+    for path in directory.glob(f"{slug}-page-*{suffix}*"):
+        m = stale.fullmatch(path.name)
+        if m and int(m.group(1)) > pages:
+            path.unlink()
+            metrics.count("files_removed")
+            metrics.log(f"[remove] {path.relative_to(PUBLIC_DIR.parent)}")
+
+def _pagination_parts(slug: str, page: int, pages: int, base_url=None):
+    # (<link rel=prev/next> tags for <head>, visible prev/next nav) for page `page` of `pages`.
+    if pages <= 1:
+        return "", ""
+    base_url = base_url or f"{SITE_URL}/categories"
+    head = []
+    nav = []
+    if page > 1:
+        prev_url = f"{base_url}/{page_file_name(slug, page - 1)}"
+        head.append(f'<link rel="prev" href="{prev_url}"/>')
+        nav.append(f'<a rel="prev" href="{prev_url}">← Previous</a>')
+    nav.append(f"Page {page} of {pages}")
+    if page < pages:
+        next_url = f"{base_url}/{page_file_name(slug, page + 1)}"
+        head.append(f'<link rel="next" href="{next_url}"/>')
+        nav.append(f'<a rel="next" href="{next_url}">Next →</a>')
+    return "\n".join(head) + "\n", '<nav class="pagination">' + " | ".join(nav) + "</nav>\n"
+
+def _category_page_parts(title: str, description: str, today=None, pagination=None, json_ld=""):
+    # pagination: optional (slug, page, pages) for one page of a split category.
+    today = today or datetime.utcnow().date()
+    head, foot = CATEGORY_PAGE_TEMPLATE.split("{rows}")
+    pagination_head, pagination_nav = _pagination_parts(*pagination) if pagination else ("", "")
+    fields = dict(title=html.escape(title), description=html.escape(description), site_url=SITE_URL,
+                  year=today.year, site_name=html.escape(SITE_NAME), json_ld=json_ld,
+                  pagination_head=pagination_head, pagination_nav=pagination_nav)
+    return head.format(**fields), foot.format(**fields)
+
+def render_category_page(title: str, description: str, items, today=None, pagination=None):
+    items = list(items)
+    head, foot = _category_page_parts(title, description, today, pagination,
+                                      STRUCTURED_DATA.item_list(title, items))
+    rows = "\n".join(f'<li><a href="{u}">{html.escape(l)}</a></li>' for u,l in items)
+    return head + rows + foot
+
+def write_category_page(path: Path, title: str, description: str, items, today=None, pagination=None):
+    # One (possibly paginated) page of a category.
+    return write_html(path, render_category_page(title, description, items, today, pagination))
+
+def write_category_pages(slug: str, title: str, description: str, items, count: int,
+                         today=None, page_size=CATEGORY_PAGE_SIZE, api=False):
+    # Split one category into numbered pages of page_size items (0 = a single page), drop
+    # pages left over from when the category was bigger, and return (file name, write future)
+    # for every page. With api, each page also gets its JSON shard under api/categories/.
+    pages = max(1, -(-count // page_size)) if page_size else 1
+    items = iter(items)
+    written = []
+    for page in range(1, pages + 1):
+        name = page_file_name(slug, page)
+        page_title = title if page == 1 else f"{title} — Page {page}"
+        chunk = list(itertools.islice(items, page_size) if page_size else items)
+        future = write_category_page(CATEGORIES_DIR / name, page_title, description, chunk, today, (slug, page, pages))
+        if api:
+            write_api_listing("categories", slug, title, count, page, pages, chunk, f"{SITE_URL}/categories/{name}")
+        written.append((name, future))
+    remove_stale_pages(CATEGORIES_DIR, slug, pages)
+    if api:
+        remove_stale_pages(API_DIR / "categories", slug, pages, ".json")
+    return written
+
+def length_label(name: str) -> str:
+    nlen = len(name.replace(" ", ""))
+    if nlen <= 4:
+        return "Short (1-4)"
+    elif nlen <= 7:
+        return "Medium (5-7)"
+    return "Long (8+)"
+
+def row_facets(row):
+    # Category memberships of a row as (kind, label) pairs: gender, origin and length.
+    name = (row.get("name") or "").strip()
+    gender = (row.get("gender") or "").strip().lower()
+    if gender in ("male","m"):
+        yield ("gender", "Male")
+    elif gender in ("female","f"):
+        yield ("gender", "Female")
+    else:
+        yield ("gender", "Unisex/Unknown")
+    yield ("origin", (row.get("origin") or "Unknown").strip())
+    yield ("length", length_label(name))
+
+def category_listing(counts):
+    # Every category in page order as (kind, label, slug, title, description, count), given
+    # {(kind, label): count}: genders, then origins (largest first), then length buckets.
+    by_kind = defaultdict(list)
+    for kind, label in counts:
+        by_kind[kind].append(label)
+    listing = []
+    for label in sorted(by_kind["gender"]):
+        n = counts[("gender", label)]
+        listing.append(("gender", label, slugify_simple(label), f"{label} Names",
+                        f"{n} {label.lower()} names from the site.", n))
+    for label in sorted(by_kind["origin"], key=lambda o: (-counts[("origin", o)], o.lower())):
+        n = counts[("origin", label)]
+        listing.append(("origin", label, f"origin-{slugify_simple(label)}", f"{label} Names",
+                        f"{n} names with origin: {label}.", n))
+    for label in sorted(by_kind["length"]):
+        n = counts[("length", label)]
+        listing.append(("length", label, f"length-{slugify_simple(label)}", f"{label} Names",
+                        f"{n} names of length category: {label}.", n))
+    return listing
+
+def render_category_index(listing, today=None):
+    rows = [(f"{SITE_URL}/categories/{slug}.html", f"{label} ({n})") for _kind, label, slug, _title, _desc, n in listing]
+    return render_category_page("Categories", "Browse name categories by gender, origin, and length.", rows, today)
+
+def generate_categories(facets, today=None, page_size=CATEGORY_PAGE_SIZE, api=False):
+    # `facets` is a SortedSpool keyed by row_facets() pairs, holding (sort_key, seq, url, label)
+    # entries, so each page streams its presorted members. Like generate_letter_pages, returns
+    # (url, rewritten) for every page; unchanged pages keep their bytes and sitemap lastmod.
+    listing = category_listing(facets.counts)
+    written = []
+    for kind, label, slug, title, desc, n in listing:
+        members = ((url, name) for _key, _seq, url, name in facets.items((kind, label)))
+        written += write_category_pages(slug, title, desc, members, n, today, page_size, api)
+    written.append(("index.html", write_html(CATEGORIES_DIR / "index.html", render_category_index(listing, today))))
+    return [(f"{SITE_URL}/categories/{name}", future.result()[1]) for name, future in written]
+
+# ---- Letter pages (names-a.html ... names-z.html) ----
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+LETTER_PAGE_TEMPLATE = """<!doctype html>
+<html lang="en"><head>
+<meta charset="utf-8"/>
+<meta name="viewport" content="width=device-width,initial-scale=1"/>
+<title>Names starting with {letter}{page_suffix} — {site_name}</title>
+<meta name="description" content="List of names that start with {letter}."/>
+{pagination_head}</head><body>
+<header><a href="{site_url}">Home</a> › <strong>Names: {letter}{page_suffix}</strong></header>
 <main>
-<h1>{html.escape(title)}</h1>
-<p>{html.escape(description)}</p>
+<h1>Names: {letter}{page_suffix}</h1>
 <ul>
 {rows}
 </ul>
-<p><a href="{SITE_URL}/categories/index.html">All categories</a></p>
+{pagination_nav}<p><a href="{site_url}/names/index.html">All names index</a></p>
 </main>
-<footer>© {datetime.utcnow().year} {html.escape(SITE_NAME)}</footer>
+<footer>© {year} {site_name}</footer>
 </body></html>"""
 
-def generate_categories(csv_rows, pages):
-    # Build lookup: name_lower -> (url,label)
-    lookup = {}
-    for url,label in pages:
-        lookup[label.strip().lower()] = (url, label)
+def name_letter(name: str) -> str:
+    # Bucket by the first letter of the normalized search key ("Élodie" -> "e"); "" if not a-z.
+    first = search_key(name)[:1]
+    return first if first and first in LETTERS else ""
+
+def render_letter_page(letter: str, items, page=1, pages=1, today=None):
+    # One page of the names starting with `letter`; items are (url, name) pairs.
+    today = today or datetime.utcnow().date()
+    rows = "\n".join(f'<li><a href="{url}">{html.escape(name)}</a></li>' for url, name in items)
+    pagination_head, pagination_nav = _pagination_parts(f"names-{letter}", page, pages, SITE_URL)
+    return LETTER_PAGE_TEMPLATE.format(
+        letter=letter.upper(), page_suffix=f" — Page {page}" if page > 1 else "",
+        site_name=html.escape(SITE_NAME), site_url=SITE_URL, rows=rows, year=today.year,
+        pagination_head=pagination_head, pagination_nav=pagination_nav)
+
+def generate_letter_pages(letters, today=None, page_size=CATEGORY_PAGE_SIZE, only=LETTERS, api=False):
+    # `letters` is a SortedSpool keyed by letter with presorted (sort_key, seq, url, name) entries.
+    # Every letter in `only` gets a page (empty if no names), split like category pages; only
+    # pages whose bytes changed are rewritten. Returns (url, rewritten) for every page. With api,
+    # each page also gets its JSON shard under api/letters/.
+    today = today or datetime.utcnow().date()
+    pages_out = []
+    for letter in only:
+        n = letters.counts.get(letter, 0)
+        pages = max(1, -(-n // page_size)) if page_size else 1
+        members = iter(letters.items(letter)) if n else iter(())
+        slug = f"names-{letter}"
+        for page in range(1, pages + 1):
+            chunk = [(url, name) for _key, _seq, url, name in
+                     (itertools.islice(members, page_size) if page_size else members)]
+            page_html = render_letter_page(letter, chunk, page, pages, today)
+            name = page_file_name(slug, page)
+            pages_out.append((f"{SITE_URL}/{name}", write_html(PUBLIC_DIR / name, page_html)))
+            if api:
+                write_api_listing("letters", letter, f"Names starting with {letter.upper()}", n, page, pages,
+                                  chunk, f"{SITE_URL}/{name}")
+        remove_stale_pages(PUBLIC_DIR, slug, pages)
+        if api:
+            remove_stale_pages(API_DIR / "letters", letter, pages, ".json")
+    return [(url, future.result()[1]) for url, future in pages_out]
+
+# ---- Static JSON API (api/names/<slug>.json, api/letters/, api/categories/, api/index.json) ----
+API_URL = f"{SITE_URL}/api"
+
+def api_json(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+def api_page_name(slug: str, page: int = 1) -> str:
+    # Shard names follow the HTML pages: <slug>.json, <slug>-page-N.json.
+    return page_file_name(slug, page)[:-len(".html")] + ".json"
+
+def name_document(row, slug: str, lastmod: str, related=()) -> str:
+    # The machine-readable twin of a name page: raw CSV fields plus the links the page shows.
+    name = row["name"].strip()
+    gender = (row.get("gender") or "").strip()
+    origin = (row.get("origin") or "").strip()
+    return api_json({
+        "name": name,
+        "slug": slug,
+        "url": f"{SITE_URL}/names/{slug}.html",
+        "meaning": (row.get("meaning") or "").strip(),
+        "origin": origin,
+        "gender": gender,
+        "traits": (row.get("traits") or "").strip(),
+        "pronunciation": (row.get("pronunciation") or "").strip(),
+        "categories": [{"label": label, "url": url} for label, url in
+                       category_links(name, gender.capitalize() or "Unspecified", origin or "Unknown")],
+        "related": [{"name": other, "slug": other_slug} for other, other_slug in related],
+        "lastmod": lastmod,
+    })
+
+def write_api_listing(kind: str, slug: str, title: str, count: int, page: int, pages: int, members, html_url: str):
+    # One shard of a letter/category listing; members are the (url, name) pairs on that HTML page.
+    doc = {
+        "title": title,
+        "count": count,
+        "page": page,
+        "pages": pages,
+        "next": f"{API_URL}/{kind}/{api_page_name(slug, page + 1)}" if page < pages else None,
+        "html": html_url,
+        "names": [{"name": name, "slug": url.rsplit("/", 1)[-1][:-len(".html")]} for url, name in members],
+    }
+    return shared_writer().write(API_DIR / kind / api_page_name(slug, page), api_json(doc), "write_api")
+
+def write_api_index(listing, letter_counts, total: int, today=None):
+    # api/index.json: entry points and counts for every letter and category shard.
+    today = today or datetime.utcnow().date()
+    doc = {
+        "updated": today.isoformat(),
+        "names": total,
+        "name_url": f"{API_URL}/names/{{slug}}.json",
+        "letters": [{"letter": letter, "count": letter_counts.get(letter, 0),
+                     "url": f"{API_URL}/letters/{api_page_name(letter)}"} for letter in LETTERS],
+        "categories": [{"kind": kind, "label": label, "title": title, "count": n,
+                        "url": f"{API_URL}/categories/{api_page_name(slug)}"}
+                       for kind, label, slug, title, _desc, n in listing],
+    }
+    return shared_writer().write(API_DIR / "index.json", api_json(doc), "write_api")
+
+# ---- Related names ----
+def build_related_index(path: Path, cache=True):
+    # Extra pass over the CSV; keeps only name, slug, origin and gender per row.
+    index = RelatedIndex()
+    for row in iter_csv(path, cache):
+        name = (row.get("name") or "").strip()
+        if name:
+            index.add(name, slugify(name), row.get("origin", ""), row.get("gender", ""))
+    return index
+
+def related_inputs(row, k):
+    # What a row's related names are computed from, kept in its manifest entry as "rel".
+    return [(row.get("name") or "").strip(), (row.get("origin") or "").strip(), (row.get("gender") or "").strip(), k]
+
+def plan_related(path: Path, previous, k, cache=True):
+    # (index, stale, inputs) for an incremental build: the RelatedIndex of the CSV, the slugs
+    # whose related names must be looked up again (None = all of them; the others reuse the
+    # "related" list in their manifest entry) and related_inputs() by slug. The index the last
+    # build used is rebuilt from the manifest and brought up to date one changed name at a time,
+    # collecting RelatedIndex.affected() as apply_edit does; since results do not depend on
+    # insertion order, that ends as exactly the index of the current CSV.
+    inputs = {}
+    for row in iter_csv(path, cache):
+        name = (row.get("name") or "").strip()
+        if name:
+            inputs.setdefault(slugify(name), related_inputs(row, k))
+    old = {slug: entry["rel"] for slug, entry in previous.items()
+           if entry.get("rel") and entry["rel"][3] == k and entry.get("related") is not None}
+    changed = [slug for slug, rel in inputs.items() if old.get(slug) != rel]
+    gone = [slug for slug in old if slug not in inputs]
+    index = RelatedIndex()
+    # Past a tenth of the catalogue, looking everything up again is cheaper than tracing edits.
+    if len(changed) + len(gone) > len(inputs) // 10:
+        for slug, (name, origin, gender, _k) in inputs.items():
+            index.add(name, slug, origin, gender)
+        return index, None, inputs
+    for slug, (name, origin, gender, _k) in old.items():
+        index.add(name, slug, origin, gender)
+    stale = set(changed)
+    for slug in gone:
+        stale.update(index.affected(slug))
+        index.remove(slug)
+    for slug in changed:
+        if slug in old:
+            stale.update(index.affected(slug))
+            index.remove(slug)
+        name, origin, gender, _k = inputs[slug]
+        index.add(name, slug, origin, gender)
+        stale.update(index.affected(slug))
+    return index, stale, inputs
+
+# ---- Page rendering (serial or process pool) ----
+def render_row(row, deterministic=False, seed="", today=None, related=(), api=False):
+    # Render one row and queue its page (and with api, its JSON document) on the shared writer;
+    # returns (slug, lastmod, future of the page write).
+    with metrics.span("build_html"):
+        if deterministic:
+            slug = slugify(row.get("name") or "")
+            slug, html_content, lastmod = build_html(row, page_rng(slug, seed), row_date(row, today), related)
+        else:
+            slug, html_content, lastmod = build_html(row, related=related)
+    writer = shared_writer()
+    future = writer.write(NAMES_DIR / f"{slug}.html", html_content, "write_name_page")
+    if api:
+        writer.write(API_DIR / "names" / f"{slug}.json", name_document(row, slug, lastmod, related), "write_api")
+    return slug, lastmod, future
+
+def render_rows(items, deterministic=False, seed="", today=None, io_workers=None, minify=False, api=False):
+    # Render a chunk of (row, related) pairs, letting the writer threads overlap with rendering,
+    # then wait for the chunk's writes. Returns [(slug, lastmod, existed)].
+    writer = shared_writer(io_workers, minify)
+    queued = [render_row(row, deterministic, seed, today, related, api) for row, related in items]
+    results = [(slug, lastmod, future.result()[0]) for slug, lastmod, future in queued]
+    if api:
+        writer.flush()
+    return results
+
+def _init_worker(config_args, quiet):
+    # Pool workers are spawned, so they import this module afresh: give them the parent's paths.
+    configure(*config_args)
+    metrics.quiet = quiet
 
-    by_gender = defaultdict(list)
-    by_origin = defaultdict(list)
-    by_length = defaultdict(list)
+def _render_chunk(task):
+    # Runs in a pool worker; the worker's span/counter totals for this chunk travel back with it.
+    metrics.reset()
+    results = render_rows(*task)
+    return results, metrics.snapshot()
 
-    for r in csv_rows:
-        name = (r.get("name") or "").strip()
+def plan_rows(rows, previous, mode, related=None, related_k=6, render=True, today=None, api=False):
+    # Yields (row, slug, digest, prev, related, rel); prev is the manifest entry only when the
+    # page (and, with api, its JSON document) can be skipped. `related` is plan_related()'s result (None when related names are off);
+    # only stale rows are looked up in its index. rel is the row's related_inputs(), or None.
+    # With render=False (the pages phase is not run) every row is passed on as last built,
+    # keeping its manifest entry; rows never built have a None digest.
+    index, stale, inputs = related or (None, None, {})
+    for row in rows:
+        name = (row.get("name") or "").strip()
         if not name:
             continue
-        key = name.lower()
-        if key in lookup:
-            url, label = lookup[key]
-        else:
-            slug = slugify(name)
+        slug = slugify(name)
+        prev = previous.get(slug)
+        if not render:
+            prev = prev or {"digest": None, "lastmod": None}
+            yield row, slug, prev["digest"], prev, prev.get("related"), prev.get("rel")
+            continue
+        names, rel = [], None
+        if index is not None:
+            rel = inputs[slug]
+            if stale is None or slug in stale or not prev or prev.get("rel") != rel:
+                names = index.related(slug, related_k)
+            else:
+                names = prev["related"]
+        digest = row_digest(row, mode, names, today)
+        if not (prev and prev.get("digest") == digest and (NAMES_DIR / f"{slug}.html").exists()
+                and (not api or (API_DIR / "names" / f"{slug}.json").exists())):
+            prev = None
+        yield row, slug, digest, prev, names, rel
+
+def render_stream(planned, deterministic=False, seed="", today=None, workers=1, chunk_size=64, io_workers=None,
+                  minify=False, api=False):
+    # Yields (row, slug, digest, lastmod, status, related, rel) in input order, status being "created",
+    # "overwritten" or "unchanged". With workers > 1, chunks go to a process pool with at most
+    # 2 * workers chunks in flight, so memory stays bounded however long the input is.
+    def finish(chunk, results):
+        results = iter(results)
+        for row, slug, digest, prev, related, rel in chunk:
+            if prev:
+                metrics.count("files_skipped")
+                yield row, slug, digest, prev.get("lastmod") or today.isoformat(), "unchanged", related, rel
+            else:
+                _slug, lastmod, existed = next(results)
+                yield row, slug, digest, lastmod, "overwritten" if existed else "created", related, rel
+
+    def finish_pooled(chunk, future):
+        results, snapshot = future.result()
+        metrics.merge(snapshot)
+        yield from finish(chunk, results)
+
+    planned = iter(planned)
+    chunks = iter(lambda: list(itertools.islice(planned, chunk_size)), [])
+    if workers <= 1:
+        for chunk in chunks:
+            todo = [(row, related) for row, _slug, _digest, prev, related, _rel in chunk if not prev]
+            yield from finish(chunk, render_rows(todo, deterministic, seed, today, io_workers, minify, api))
+        return
+    # Spawned rather than forked: the parent has live writer threads, and a fork would copy them
+    # (and their locks) mid-write.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker, initargs=(CONFIG_ARGS, metrics.quiet)) as pool:
+        pending = deque()
+        for chunk in chunks:
+            todo = [(row, related) for row, _slug, _digest, prev, related, _rel in chunk if not prev]
+            pending.append((chunk, pool.submit(_render_chunk,
+                                               (todo, deterministic, seed, today, io_workers, minify, api))))
+            if len(pending) >= 2 * workers:
+                yield from finish_pooled(*pending.popleft())
+        while pending:
+            yield from finish_pooled(*pending.popleft())
+
+# ---- Single-pass aggregation ----
+class BuildAggregate:
+    # Everything the post-render stages need, collected while the name pages stream past:
+    # manifest entries, changed sitemap URLs, facet/letter/search buckets (presorted spools,
+    # with counts) and status totals. Later stages never read generated output back.
+    # Without the sitemap phase, pages that need a sitemap entry are flagged "pending" in the
+    # manifest instead; `pending` holds the slugs earlier runs flagged, added once it runs.
+
+    def __init__(self, run_size=None, full_sitemap=False, sitemap=True, pending=frozenset()):
+        self.full_sitemap = full_sitemap
+        self.sitemap = sitemap
+        self.pending = pending
+        self.manifest = {}
+        self.stats = Counter()
+        self.sitemap_entries = SortedSpool(run_size)
+        self.facets = SortedSpool(run_size)
+        self.letters = SortedSpool(run_size)
+        self.search_entries = SortedSpool(run_size)
+
+    def consume(self, rendered):
+        # Last pipeline stage: record one rendered row, pass (url, name) on to the index writer.
+        for seq, (row, slug, digest, lastmod, status, related, rel) in enumerate(rendered):
+            self.stats[status] += 1
+            self.manifest[slug] = entry = {"digest": digest, "lastmod": lastmod}
+            if rel is not None:
+                entry["related"], entry["rel"] = related, rel
+            name = row["name"].strip()
             url = f"{SITE_URL}/names/{slug}.html"
-            label = name
+            if self.full_sitemap or status != "unchanged" or slug in self.pending:
+                if self.sitemap:
+                    self.sitemap_entries.add("url", (url, lastmod))
+                else:
+                    entry["pending"] = True
+            entry = (name.lower(), seq, url, name)
+            for facet in row_facets(row):
+                self.facets.add(facet, entry)
+            letter = name_letter(name)
+            if letter:
+                self.letters.add(letter, entry)
+            key = search_key(name)
+            if key:
+                meaning = (row.get("meaning") or "").strip()[:60]
+                self.search_entries.add(key[:SEARCH_PREFIX_LEN], (key, name, slug, meaning))
+            yield url, name
 
-        gender = (r.get("gender") or "").strip().lower()
-        if gender in ("male","m"):
-            by_gender["Male"].append((url, label))
-        elif gender in ("female","f"):
-            by_gender["Female"].append((url, label))
-        else:
-            by_gender["Unisex/Unknown"].append((url, label))
+    def add_page(self, url: str, lastmod: str, changed: bool = True):
+        # Sitemap entry for a listing page written after the render pass.
+        if self.full_sitemap or changed:
+            self.sitemap_entries.add("url", (url, lastmod))
 
-        origin = (r.get("origin") or "Unknown").strip()
-        by_origin[origin].append((url, label))
+    def close(self):
+        for spool in (self.sitemap_entries, self.facets, self.letters, self.search_entries):
+            spool.close()
 
-        nlen = len(name.replace(" ", ""))
-        if nlen <= 4:
-            by_length["Short (1-4)"].append((url, label))
-        elif nlen <= 7:
-            by_length["Medium (5-7)"].append((url, label))
-        else:
-            by_length["Long (8+)"].append((url, label))
-
-    # Write gender pages
-    for gender_label, items in sorted(by_gender.items()):
-        title = f"{gender_label} Names"
-        desc = f"{len(items)} {gender_label.lower()} names from the site."
-        out = CATEGORIES_DIR / f"{slugify_simple(gender_label)}.html"
-        write_html(out, render_category_page(title, desc, sorted(items, key=lambda x: x[1].lower())))
-
-    # Write origin pages
-    for origin_label, items in sorted(by_origin.items(), key=lambda x: (-len(x[1]), x[0].lower())):
-        safe_slug = slugify_simple(origin_label)
-        title = f"{origin_label} Names"
-        desc = f"{len(items)} names with origin: {origin_label}."
-        out = CATEGORIES_DIR / f"origin-{safe_slug}.html"
-        write_html(out, render_category_page(title, desc, sorted(items, key=lambda x: x[1].lower())))
-
-    # Write length pages
-    for label, items in sorted(by_length.items()):
-        title = f"{label} Names"
-        desc = f"{len(items)} names of length category: {label}."
-        out = CATEGORIES_DIR / f"length-{slugify_simple(label)}.html"
-        write_html(out, render_category_page(title, desc, sorted(items, key=lambda x: x[1].lower())))
-
-    # Build categories index
-    index_rows = []
-    for gender_label, items in sorted(by_gender.items()):
-        slug = slugify_simple(gender_label)
-        index_rows.append((f"{SITE_URL}/categories/{slug}.html", f"{gender_label} ({len(items)})"))
-    for origin_label, items in sorted(by_origin.items(), key=lambda x: (-len(x[1]), x[0].lower())):
-        slug = f"origin-{slugify_simple(origin_label)}"
-        index_rows.append((f"{SITE_URL}/categories/{slug}.html", f"{origin_label} ({len(items)})"))
-    for label, items in sorted(by_length.items(), key=lambda x: x[0]):
-        slug = f"length-{slugify_simple(label)}"
-        index_rows.append((f"{SITE_URL}/categories/{slug}.html", f"{label} ({len(items)})"))
-
-    index_html = render_category_page("Categories", "Browse name categories by gender, origin, and length.", index_rows)
-    write_html(CATEGORIES_DIR / "index.html", index_html)
+# ---- Stale output pruning ----
+def url_path(url: str):
+    # Path of a site URL relative to public/ ("names/asha.html"), or None for other hosts.
+    prefix = SITE_URL + "/"
+    return unquote(url[len(prefix):]) if url.startswith(prefix) else None
+
+def is_generated_path(rel: str) -> bool:
+    return any(fnmatchcase(rel, pattern) for pattern in PRUNE_PATTERNS)
+
+def linked_paths():
+    # public/-relative targets of the links in the hand-maintained top-level pages.
+    paths = set()
+    for page in PUBLIC_DIR.glob("*.html"):
+        if is_generated_path(page.name):
+            continue
+        for href in re.findall(r'href="([^"#?]+)', page.read_text(encoding="utf-8", errors="replace")):
+            rel = url_path(href) if "://" in href else unquote(href)
+            if rel:
+                paths.add(posixpath.normpath(rel.lstrip("/")))
+    return paths
+
+class OutputSet:
+    # Membership test for the public/-relative paths one build produced. Name pages are looked up
+    # in the build manifest (slug -> entry) rather than copied into a set of paths; the pages
+    # auto_generate.py makes from public/names_master.txt count as live too. With api, JSON API
+    # files are live when the page they mirror is.
+
+    def __init__(self, slugs, urls, api=False):
+        self.slugs = slugs
+        self.api = api
+        self.paths = {url_path(url) for url in urls}
+        self.paths.update(path for path in linked_paths() if (PUBLIC_DIR / path).exists())
+        self.paths.update(f"names/{master_slug(name)}.html" for name in cached_master_names(PUBLIC_MASTER_FILE))
+
+    def __contains__(self, rel):
+        if rel in self.paths or any(fnmatchcase(rel, pattern) for pattern in PRUNE_KEEP):
+            return True
+        if rel.startswith("api/"):
+            if not self.api:
+                return False
+            kind, _, file_name = rel[len("api/"):].partition("/")
+            stem = file_name[:-len(".json")]
+            rel = {"names": f"names/{stem}.html", "categories": f"categories/{stem}.html",
+                   "letters": f"names-{stem}.html"}.get(kind, rel)
+            if rel in self.paths:
+                return True
+        return rel.startswith("names/") and rel.endswith(".html") and rel[len("names/"):-len(".html")] in self.slugs
+
+def stale_files(live: OutputSet):
+    # Generated files on disk (and their precompressed .gz/.br siblings) not in `live`.
+    stale = []
+    for pattern in PRUNE_PATTERNS:
+        for suffix in ("", ".gz", ".br"):
+            for path in PUBLIC_DIR.glob(pattern + suffix):
+                rel = path.relative_to(PUBLIC_DIR).as_posix()
+                if rel[:len(rel) - len(suffix)] not in live:
+                    stale.append(path)
+    return sorted(stale)
+
+def stale_sitemap_urls(live: OutputSet):
+    # Sitemap URLs for generated pages that are not in `live`.
+    if not SITEMAP_DB.exists():
+        return []
+    store = SitemapStore(SITEMAP_DB)
+    try:
+        return [loc for loc in store.locs()
+                if (rel := url_path(loc)) is not None and is_generated_path(rel) and rel not in live]
+    finally:
+        store.close()
+
+def prune_outputs(live: OutputSet, today=None, gzip_output=False, dry_run=False):
+    # Delete orphaned pages and drop their sitemap URLs; with dry_run, only list them.
+    files = stale_files(live)
+    urls = stale_sitemap_urls(live)
+    verb = "Would remove" if dry_run else "Removed"
+    for path in files:
+        if not dry_run:
+            path.unlink()
+            metrics.count("files_pruned")
+        (print if dry_run else metrics.log)(f"[prune] {verb} {path}")
+    for url in urls:
+        (print if dry_run else metrics.log)(f"[prune] {verb} sitemap URL {url}")
+    if urls and not dry_run:
+        update_sitemap((), today, gzip_output, remove=urls)
+    print(f"[prune] {verb} {len(files)} stale file(s) and {len(urls)} sitemap URL(s)")
+    return files, urls
+
+# ---- Watch mode ----
+FACET_KINDS = ("gender", "origin", "length")
+
+class WatchState:
+    # In-memory copy of what the listing pages are built from, kept current between edits:
+    # rows by slug, each row's listing entries, the members of every listing and a related-names
+    # index. Listing keys are row_facets() pairs plus ("letter", x) and ("search", prefix).
+
+    def __init__(self, rows, snapshot, manifest):
+        self.snapshot = snapshot
+        # Kept in memory and saved when watching stops: a stale manifest on disk only makes the
+        # next build re-render pages whose digests no longer match.
+        self.manifest = manifest
+        self.rows = {}                      # slug -> row
+        self.slugs = {}                     # name as written in the CSV -> slug
+        self.seq = {}                       # slug -> CSV position; new rows go last
+        self.entries = {}                   # slug -> {listing key: entry}
+        self.members = defaultdict(dict)    # listing key -> {slug: entry}
+        self.related = RelatedIndex()
+        # Slugs shared by differently spelled names ("Daa", "Daaä"). A build lists every such row
+        # but this state keeps one row per slug, so edits fall back to a full pass while any exist.
+        self.collisions = set()
+        self._next_seq = 0
+        for row in rows:
+            self.add(row)
+        # Search entries of names_master.txt pages by prefix, with the slug a CSV row for the same
+        # name would get; spool() leaves out those a current row has a page for.
+        self.master = defaultdict(list)
+        for prefix, entry in master_search_entries(()):
+            self.master[prefix].append((slugify(entry[1]), entry))
+
+    @staticmethod
+    def listing_entries(row, slug, seq):
+        name = row["name"].strip()
+        entry = (name.lower(), seq, f"{SITE_URL}/names/{slug}.html", name)
+        entries = {facet: entry for facet in row_facets(row)}
+        letter = name_letter(name)
+        if letter:
+            entries[("letter", letter)] = entry
+        key = search_key(name)
+        if key:
+            meaning = (row.get("meaning") or "").strip()[:60]
+            entries[("search", key[:SEARCH_PREFIX_LEN])] = (key, name, slug, meaning)
+        return entries
+
+    def add(self, row):
+        name = (row.get("name") or "").strip()
+        if not name:
+            return None
+        slug = self.slugs.get(name) or slugify(name)
+        self.slugs[name] = slug
+        old = self.rows.get(slug)
+        if old is not None and name_key(old.get("name")) != name_key(name):
+            self.collisions.add(slug)
+        # Leave the related index alone unless a field it scores on changed.
+        reindex = old is None or any((old.get(f) or "").strip() != (row.get(f) or "").strip()
+                                     for f in ("name", "origin", "gender"))
+        self.remove(slug, keep_seq=True, keep_related=not reindex)
+        if slug not in self.seq:
+            self.seq[slug] = self._next_seq
+            self._next_seq += 1
+        seq = self.seq[slug]
+        self.rows[slug] = row
+        self.entries[slug] = entries = self.listing_entries(row, slug, seq)
+        for key, entry in entries.items():
+            self.members[key][slug] = entry
+        if reindex:
+            self.related.add(name, slug, row.get("origin", ""), row.get("gender", ""))
+        return slug
+
+    def collides(self, added) -> bool:
+        # Whether applying these added/changed rows would give a slug to two different names.
+        for key, row in added.items():
+            other = self.rows.get(slugify(row.get("name") or ""))
+            if other is not None and name_key(other.get("name")) != key:
+                return True
+        return False
+
+    def remove(self, slug, keep_seq=False, keep_related=False):
+        self.rows.pop(slug, None)
+        if not keep_seq:
+            self.seq.pop(slug, None)
+        for key in self.entries.pop(slug, {}):
+            members = self.members[key]
+            members.pop(slug, None)
+            if not members:
+                del self.members[key]
+        if not keep_related:
+            self.related.remove(slug)
+
+    def spool(self, keys):
+        # SortedSpool of the given listings' members, in the shape the page writers expect.
+        spool = SortedSpool()
+        for key in keys:
+            for entry in self.members.get(key, {}).values():
+                spool.add(key[1] if key[0] in ("letter", "search") else key, entry)
+            if key[0] == "search":
+                for csv_slug, entry in self.master.get(key[1], ()):
+                    if entry[2] not in self.rows and csv_slug not in self.rows:
+                        spool.add(key[1], entry)
+        return spool
+
+    def index_entries(self):
+        # (url, name) for the names index in CSV order, reading only the name column.
+        with open(CSV_FILE, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = [h.strip().lower() for h in next(reader, [])]
+            if "name" not in header:
+                return
+            col = header.index("name")
+            for fields in reader:
+                name = fields[col].strip() if len(fields) > col else ""
+                if name:
+                    slug = self.slugs.get(name) or slugify(name)
+                    yield f"{SITE_URL}/names/{slug}.html", name
+
+def apply_edit(state: WatchState, removed: dict, added: dict, args):
+    # Bring public/ up to date with one names.csv edit. removed/added are diff_csv() results.
+    # Rewritten: name pages of added/changed rows, neighbouring pages whose related links now
+    # differ, and the listings whose entries changed. Pages of rows that are gone are deleted.
+    # With --compress, what it rewrites is precompressed again and what it deletes loses its
+    # .gz/.br siblings too.
+    today, mode = build_date(args)
+    writer = shared_writer(args.io_workers, args.minify)
+    writer.written = [] if args.compress else None
+    manifest = state.manifest
+    gone = {slugify(row["name"]) for key, row in removed.items() if key not in added} - {""}
+    gone -= {slugify(row["name"]) for row in added.values()}
+    touched_keys = set()
+    sitemap_add, sitemap_remove = [], []
+    # Pages whose related links an edit can change (RelatedIndex.affected, taken before a name is
+    # removed and after it is added); only those whose links did change are re-rendered.
+    neighbours = set()
+
+    def near(slug):
+        if args.related > 0:
+            neighbours.update(state.related.affected(slug))
+
+    def extra_pages(directory, slug):
+        # Existing -page-N files of a listing; those it no longer has leave the sitemap.
+        return {path.name for path in directory.glob(f"{slug}-page-*.html")}
+
+    for slug in gone:
+        near(slug)
+        touched_keys.update(state.entries.get(slug, {}))
+        state.remove(slug)
+        manifest.pop(slug, None)
+        for page in (NAMES_DIR / f"{slug}.html", API_DIR / "names" / f"{slug}.json"):
+            if remove_output(page):
+                metrics.log(f"[remove] {page.relative_to(PUBLIC_DIR.parent)}")
+        sitemap_remove.append(f"{SITE_URL}/names/{slug}.html")
+
+    changed_slugs = []
+    new_pages = False
+    for row in added.values():
+        slug = slugify(row.get("name") or "")
+        new_pages = new_pages or slug not in state.rows
+        before = state.entries.get(slug, {})
+        if before:
+            near(slug)
+        if state.add(row) is None:
+            continue
+        near(slug)
+        after = state.entries[slug]
+        touched_keys.update(key for key in before.keys() | after.keys() if before.get(key) != after.get(key))
+        changed_slugs.append(slug)
+
+    items = [(state.rows[slug], state.related.related(slug, args.related) if args.related > 0 else [])
+             for slug in changed_slugs]
+    for slug in neighbours - set(changed_slugs) - gone:
+        row = state.rows.get(slug)
+        related = state.related.related(slug, args.related)
+        if row and manifest.get(slug, {}).get("digest") != row_digest(row, mode, related, today):
+            items.append((row, related))
+    rendered = render_rows(items, args.deterministic, args.seed, today, args.io_workers, args.minify, args.api)
+    for (row, related), (slug, lastmod, _existed) in zip(items, rendered):
+        manifest[slug] = entry = {"digest": row_digest(row, mode, related, today), "lastmod": lastmod}
+        if args.related > 0:
+            entry["related"], entry["rel"] = related, related_inputs(row, args.related)
+        sitemap_add.append((f"{SITE_URL}/names/{slug}.html", lastmod))
+
+    # Category pages whose membership changed, plus the categories index when any did.
+    facet_keys = [key for key in touched_keys if key[0] in FACET_KINDS]
+    if facet_keys:
+        counts = Counter({key: len(m) for key, m in state.members.items() if key[0] in FACET_KINDS})
+        listing = {(kind, label): (slug, title, desc, n) for kind, label, slug, title, desc, n in category_listing(counts)}
+        facets = state.spool(facet_keys)
+        for key in facet_keys:
+            if key in listing:
+                slug, title, desc, n = listing[key]
+                members = ((url, name) for _key, _seq, url, name in facets.items(key))
+                before = extra_pages(CATEGORIES_DIR, slug)
+                written = write_category_pages(slug, title, desc, members, n, today,
+                                               args.category_page_size, args.api)
+                for name, future in written:
+                    if future.result()[1]:
+                        sitemap_add.append((f"{SITE_URL}/categories/{name}", today.isoformat()))
+                sitemap_remove.extend(f"{SITE_URL}/categories/{name}"
+                                      for name in before - {name for name, _future in written})
+            else:
+                slug = slugify_simple(key[1]) if key[0] == "gender" else f"{key[0]}-{slugify_simple(key[1])}"
+                for path in [CATEGORIES_DIR / f"{slug}.html", *CATEGORIES_DIR.glob(f"{slug}-page-*.html")]:
+                    if remove_output(path):
+                        sitemap_remove.append(f"{SITE_URL}/categories/{path.name}")
+                api_dir = API_DIR / "categories"
+                for path in [api_dir / f"{slug}.json", *api_dir.glob(f"{slug}-page-*.json")]:
+                    remove_output(path)
+        facets.close()
+        write_html(CATEGORIES_DIR / "index.html", render_category_index(category_listing(counts), today))
+
+    letters = sorted(key[1] for key in touched_keys if key[0] == "letter")
+    if letters:
+        spool = state.spool([("letter", letter) for letter in letters])
+        before = {f"{SITE_URL}/{name}" for letter in letters for name in extra_pages(PUBLIC_DIR, f"names-{letter}")}
+        written = generate_letter_pages(spool, today, args.category_page_size, letters, args.api)
+        for url, rewritten in written:
+            if rewritten:
+                sitemap_add.append((url, today.isoformat()))
+        sitemap_remove.extend(before - {url for url, _rewritten in written})
+        spool.close()
+
+    prefixes = [key for key in touched_keys if key[0] == "search"]
+    if prefixes:
+        spool = state.spool(prefixes)
+        write_search_index(spool, prune=False)
+        spool.close()
+        for _kind, prefix in prefixes:
+            if prefix not in spool.counts:
+                remove_output(SEARCH_DIR / f"{search_shard_name(prefix)}.json")
+
+    if gone or new_pages:
+        # The names index follows CSV order, which the line diff does not carry: stream it again.
+        generate_index_page(state.index_entries(), args.minify)
+    if args.api and (facet_keys or letters):
+        counts = Counter({key: len(m) for key, m in state.members.items() if key[0] in FACET_KINDS})
+        letter_counts = {key[1]: len(m) for key, m in state.members.items() if key[0] == "letter"}
+        write_api_index(category_listing(counts), letter_counts, len(state.rows), today)
+
+    writer.flush()
+    if sitemap_add or sitemap_remove:
+        update_sitemap(sitemap_add, today, args.sitemap_gzip, sitemap_remove)
+    if args.compress:
+        # The names index and sitemap files are written outside the writer; compress_file() skips
+        # any whose .gz/.br are still newer than the file.
+        written, writer.written = writer.written, None
+        extra = [NAMES_DIR / "index.html", SITEMAP_INDEX_FILE, *sitemap_shard_files()]
+        compress_outputs(path for path in {*written, *extra}
+                         if path.name.endswith(COMPRESSIBLE_SUFFIXES) and path.exists())
+    return len(items), len(gone)
+
+def watch(args):
+    # Poll names.csv; on every change diff it line by line against the last snapshot and apply
+    # just that edit. Edits the line diff cannot handle fall back to a normal incremental build.
+    print(f"[watch] Watching {CSV_FILE} (Ctrl+C to stop)")
+    metrics.quiet = args.quiet
+    state = WatchState(iter_csv(CSV_FILE), csv_snapshot(CSV_FILE), load_manifest(MANIFEST_FILE))
+    signature = None
+    try:
+        while True:
+            try:
+                stat = CSV_FILE.stat()
+                current = (stat.st_mtime_ns, stat.st_size)
+            except FileNotFoundError:
+                current = None
+            if signature is None:
+                signature = current
+            if current == signature:
+                time.sleep(args.watch_interval)
+                continue
+            signature = current
+            start = time.perf_counter()
+            new_snapshot = csv_snapshot(CSV_FILE)
+            diff = diff_csv(state.snapshot, new_snapshot)
+            if diff is None or state.collisions or state.collides(diff[1]):
+                print("[watch] Edit needs a full pass; rebuilding")
+                save_manifest(MANIFEST_FILE, state.manifest)
+                build(args)
+                state = WatchState(iter_csv(CSV_FILE), new_snapshot, load_manifest(MANIFEST_FILE))
+                continue
+            changed, removed = apply_edit(state, *diff, args)
+            state.snapshot = new_snapshot
+            print(f"[watch] {changed} name page(s) rendered, {removed} removed; "
+                  f"updated in {time.perf_counter() - start:.2f} s")
+    except KeyboardInterrupt:
+        print("[watch] Stopped")
+    finally:
+        shared_writer().close()
+        save_manifest(MANIFEST_FILE, state.manifest)
 
 # ---- Main ----
-def main():
-    rows = read_csv(CSV_FILE)
-    if not rows:
+def phase_list(value: str):
+    phases = {phase.strip() for phase in value.split(",") if phase.strip()}
+    unknown = phases - set(PHASES)
+    if unknown or not phases:
+        raise argparse.ArgumentTypeError(f"unknown phase(s) {', '.join(sorted(unknown))}; choose from {', '.join(PHASES)}"
+                                         if unknown else "no phase given")
+    return tuple(phase for phase in PHASES if phase in phases)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate static name pages, sitemap, robots, index and categories.")
+    parser.add_argument("--force", action="store_true",
+                        help="ignore the build manifest and re-render every name page")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="seed template choices from each slug and take dates from the input, not the clock")
+    parser.add_argument("--seed", default="",
+                        help="extra seed mixed into --deterministic template choices")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used to render name pages (0 = one per CPU core, default 1)")
+    parser.add_argument("--chunk-size", type=int, default=64,
+                        help="rows handed to a worker per batch (default 64)")
+    parser.add_argument("--related", type=int, default=None,
+                        help="related names linked from each page (0 disables the related-names pass; "
+                             "default 6, or 0 with --stream since the index is held in memory)")
+    parser.add_argument("--category-page-size", type=int, default=CATEGORY_PAGE_SIZE,
+                        help=f"names per category page before it is split (0 = never split, default {CATEGORY_PAGE_SIZE})")
+    parser.add_argument("--sitemap-gzip", action="store_true",
+                        help="write gzipped sitemap shards (.xml.gz)")
+    parser.add_argument("--compress", action="store_true",
+                        help="write precompressed .gz (and .br if brotli is installed) next to every output")
+    parser.add_argument("--minify", action="store_true",
+                        help="strip insignificant whitespace and comments from generated HTML before writing")
+    parser.add_argument("--api", action="store_true",
+                        help="also write the static JSON API (public/api/) from the same rows")
+    parser.add_argument("--only", type=phase_list, default=PHASES, metavar="PHASES",
+                        help=f"comma-separated phases to run (default all: {','.join(PHASES)}); without "
+                             "'pages' no name page is rendered and listings use the last build's pages")
+    parser.add_argument("--stream", action="store_true",
+                        help="bounded-memory build: spill sitemap and category lists to temp files")
+    parser.add_argument("--io-workers", type=int, default=DEFAULT_IO_WORKERS,
+                        help=f"threads writing output files, per process (default {DEFAULT_IO_WORKERS})")
+    parser.add_argument("--quiet", action="store_true", help="no per-file output, only phase summaries")
+    parser.add_argument("--report", type=Path, default=REPORT_FILE,
+                        help=f"where to write the JSON build report (default {REPORT_FILE.name})")
+    parser.add_argument("--profile", type=Path, default=None, metavar="PATH",
+                        help="cProfile the render pass and dump stats to PATH (use --workers 1 to include page rendering)")
+    parser.add_argument("--watch", action="store_true",
+                        help="after building, poll names.csv and re-render only what each edit touches")
+    parser.add_argument("--watch-interval", type=float, default=0.5, help="seconds between polls (default 0.5)")
+    parser.add_argument("--prune", action="store_true",
+                        help="delete generated pages (and sitemap URLs) that this build no longer produces")
+    parser.add_argument("--prune-dry-run", action="store_true",
+                        help="list what --prune would delete, without deleting anything")
+    parser.add_argument("--spool-size", type=int, default=100000,
+                        help="entries held in memory before --stream spills a sorted run (default 100000)")
+    args = parser.parse_args(argv)
+    if args.related is None:
+        # The related-names index keeps every name's trigrams in memory, which --stream must not.
+        args.related = 0 if args.stream else 6
+    elif args.related > 0 and args.stream:
+        print(f"[stream] --related {args.related}: the related-names index is held in memory, "
+              "so memory grows with the catalogue")
+    return args
+
+def build_date(args):
+    # (today, manifest mode) for a build: --deterministic takes the date from the input, and
+    # --minify/--api output must not be mistaken for pages built without them. --stream keeps the
+    # date scan bounded too.
+    options = (":minify" if args.minify else "") + (":api" if args.api else "")
+    if args.deterministic:
+        return source_date(CSV_FILE, not args.stream), f"deterministic:{args.seed}{options}"
+    return datetime.utcnow().date(), options
+
+def build(args):
+    metrics.reset()
+    metrics.quiet = args.quiet
+    # --stream keeps memory bounded, so it reads the CSV directly rather than a whole snapshot.
+    rows = metrics.timed_iter("read_csv", iter_csv(CSV_FILE, not args.stream))
+    first = next(rows, None)
+    if first is None:
         print("No rows found in CSV. Exiting.")
-        return
+        return False
+    rows = itertools.chain([first], rows)
 
-    sitemap_additions = {}
-    index_pages = []
-    created = 0
-    overwritten = 0
+    today, mode = build_date(args)
+    phases = set(args.only)
+    pages = "pages" in phases
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    run_size = args.spool_size if args.stream else None
+    previous = {} if args.force and pages else load_manifest(MANIFEST_FILE)
+    # The sitemap store only needs URLs that changed, unless it is being (re)built from scratch.
+    agg = BuildAggregate(run_size, full_sitemap=args.force or not SITEMAP_DB.exists(), sitemap="sitemap" in phases,
+                         pending=frozenset(slug for slug, entry in previous.items() if entry.get("pending")))
 
-    for row in rows:
-        built = build_html(row)
-        if not built:
-            continue
-        slug, html_content, lastmod = built
-        out_file = NAMES_DIR / f"{slug}.html"
-        was_exist = out_file.exists()
-        out_file.write_text(html_content, encoding='utf-8')
-        if was_exist:
-            overwritten += 1
+    ensure_output_dirs(args.api)
+    if pages:
+        write_stylesheet(NAME_PAGE_CSS, ASSETS_DIR, "names")
+    shared_writer(args.io_workers, args.minify)
+
+    # parse -> plan (skip unchanged) -> render/write -> aggregate; the index writer pulls rows through,
+    # so its span covers the whole streamed pass (read_csv, build_html, ... are nested inside it).
+    with metrics.span("related_index"):
+        related = plan_related(CSV_FILE, previous, args.related, not args.stream) if args.related > 0 and pages else None
+    planned = plan_rows(rows, previous, mode, related, args.related, pages, today, args.api)
+    rendered = render_stream(planned, args.deterministic, args.seed, today, workers if pages else 1,
+                             args.chunk_size, args.io_workers, args.minify, args.api)
+    if "index" in phases:
+        with profiled(args.profile), metrics.span("generate_index_page"):
+            generate_index_page(agg.consume(rendered), args.minify)
+    else:
+        with profiled(args.profile), metrics.span("aggregate"):
+            deque(agg.consume(rendered), maxlen=0)
+
+    if not pages:
+        unbuilt = sum(1 for entry in agg.manifest.values() if entry["digest"] is None)
+        if unbuilt:
+            print(f"[only] {unbuilt} row(s) have no name page yet; run the pages phase to render them")
+    if "search" in phases:
+        with metrics.span("write_search_index"):
+            for prefix, entry in master_search_entries(agg.manifest):
+                agg.search_entries.add(prefix, entry)
+            write_search_index(agg.search_entries)
+    listing_urls = [f"{SITE_URL}/names/index.html"]
+    if "categories" in phases:
+        with metrics.span("generate_categories"):
+            for url, rewritten in generate_categories(agg.facets, today, args.category_page_size, args.api):
+                agg.add_page(url, today.isoformat(), rewritten)
+                listing_urls.append(url)
+    if "letters" in phases:
+        with metrics.span("generate_letter_pages"):
+            for url, rewritten in generate_letter_pages(agg.letters, today, args.category_page_size, api=args.api):
+                agg.add_page(url, today.isoformat(), rewritten)
+                listing_urls.append(url)
+    if args.api and phases & {"categories", "letters"}:
+        with metrics.span("write_api_index"):
+            write_api_index(category_listing(agg.facets.counts), agg.letters.counts, len(agg.manifest), today)
+    if "sitemap" in phases:
+        with metrics.span("update_sitemap"):
+            update_sitemap(agg.sitemap_entries.items("url"), today, args.sitemap_gzip)
+    # Saved after the sitemap, so a failed sitemap update leaves the pages to be picked up again.
+    # A sitemap-only run saves it too when it cleared pending flags (rows never built are left out).
+    if pages or (agg.pending and "sitemap" in phases):
+        with metrics.span("save_manifest"):
+            save_manifest(MANIFEST_FILE, agg.manifest if pages else
+                          {slug: entry for slug, entry in agg.manifest.items() if entry["digest"] is not None})
+    if "sitemap" not in phases:
+        pending = sum(1 for entry in agg.manifest.values() if entry.get("pending"))
+        if pending:
+            print(f"[only] {pending} page(s) wait for the sitemap phase to list them")
+    agg.close()
+    shared_writer().close()
+    if args.prune or args.prune_dry_run:
+        # Outputs of phases that did not run would all look stale.
+        if phases >= {"pages", "categories", "letters", "sitemap"}:
+            with metrics.span("prune"):
+                prune_outputs(OutputSet(agg.manifest, listing_urls, args.api), today, args.sitemap_gzip,
+                              dry_run=args.prune_dry_run)
         else:
-            created += 1
-        url = f"{SITE_URL}/names/{slug}.html"
-        sitemap_additions[url] = lastmod
-        index_pages.append((url, row.get("name","").strip()))
-
-    update_sitemap(sitemap_additions)
-    ensure_robots()
-    generate_index_page(index_pages)
-
-    # generate category pages using CSV rows and index_pages
-    generate_categories(rows, index_pages)
-    # add category pages to sitemap automatically
-    # iterate generated category html files and add to sitemap_additions
-    for f in CATEGORIES_DIR.glob("*.html"):
-        url = f"{SITE_URL}/categories/{f.name}"
-        sitemap_additions[url] = datetime.utcnow().date().isoformat()
-    print(f"[done] Created: {created}, Overwritten: {overwritten}, Total processed: {len(rows)}")
-    print("Next steps: git add public/names/*.html public/sitemap.xml public/robots.txt public/categories && git commit && git push")
+            print("[prune] Skipped: needs the pages, categories, letters and sitemap phases")
+    stats = agg.stats
+    if "robots" in phases:
+        ensure_robots()
+    if args.minify:
+        print_minify_report(metrics.counters["minify_bytes_in"], metrics.counters["minify_bytes_out"])
+    if args.compress:
+        with metrics.span("compress"):
+            print_report(compress_outputs(iter_compressible(PUBLIC_DIR)))
+    metrics.write_report(args.report, generator="generate_name_pages", workers=workers,
+                         pages=dict(stats),
+                         options={key: str(value) for key, value in vars(args).items()})
+    metrics.print_summary()
+    print(f"[report] Build report written to {args.report}")
+    print(f"[done] Created: {stats['created']}, Overwritten: {stats['overwritten']}, Unchanged: {stats['unchanged']}, Total processed: {sum(stats.values())}")
+    api_paths = " public/api" if args.api else ""
+    print("Next steps: git add public/names/*.html public/names-*.html public/sitemap* public/robots.txt "
+          f"public/categories public/assets public/search{api_paths} && git commit && git push")
+    return True
+
+def main(argv=None):
+    args = parse_args(argv)
+    if build(args) and args.watch:
+        watch(args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,104 @@
+# html_minify.py
+# Conservative HTML minifier for generated pages, run in-process by the output writer
+# (--minify) just before a page is written.
+#
+# Only whitespace that cannot change how a page renders is touched: indentation and line
+# breaks collapse to a single space, and whitespace next to block-level tags is dropped.
+# Text is otherwise left exactly as written. <pre>, <textarea> and executable <script>
+# bodies are copied verbatim; JSON <script> blocks (JSON-LD) are re-serialized compactly and
+# <style> bodies lose comments and insignificant whitespace. HTML comments are removed,
+# except IE conditional comments.
+
+import json
+import re
+
+from structured_data import dumps as dumps_json
+
+# Whitespace on either side of these tags never renders (head elements and block boxes).
+BLOCK_TAGS = (
+    "html", "head", "body", "title", "meta", "link", "base", "div", "p", "ul", "ol", "li", "dl", "dt", "dd",
+    "h1", "h2", "h3", "h4", "h5", "h6", "header", "footer", "main", "nav", "section", "article", "aside",
+    "table", "thead", "tbody", "tfoot", "tr", "td", "th", "form", "fieldset", "figure", "figcaption",
+    "blockquote", "hr", "br", "noscript",
+)
+
+# One C-level split of the page into text runs and (comment | raw element | block tag) tokens.
+# re.split() yields [text, comment, raw, block, text, ...], with None for the groups that did not
+# match and the leading "<" of each token dropped (a literal first character keeps the scan fast).
+# Block tags are matched in lower case only, as generated pages write them; an upper-case block
+# tag just keeps its surrounding whitespace.
+_TOKENS = re.compile(
+    r"<(?:(!--(?!\[if).*?-->)"
+    r"|((?i:script|style|pre|textarea)\b[^>]*>.*?</(?i:script|style|pre|textarea)\s*>)"
+    r"|(/?(?:%s)\b[^>]*>))" % "|".join(BLOCK_TAGS),
+    re.S,
+)
+_RAW = re.compile(r"(\w+)([^>]*)>(.*)</\w+\s*>$", re.S)
+_NEWLINE_SPACE = re.compile(r"[ \t\r\f]*\n[ \t\r\n\f]*")
+_SPACE = " \t\n\r\f"  # HTML whitespace (str.strip() alone would also eat &nbsp; characters)
+_JSON_TYPE = re.compile(r"""type\s*=\s*["']?application/(?:ld\+)?json""", re.I)
+# CSS: quoted strings are kept as they are; comments go; whitespace around punctuation goes.
+_CSS_TOKEN = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/|\s*([{};,>])\s*|(:)\s+|\s+""", re.S)
+
+
+def _css_token(m) -> str:
+    if m.group(1):
+        return m.group(1)
+    if m.group(2):
+        return m.group(2)
+    if m.group(3):
+        return ":"
+    return "" if m.group(0).startswith("/*") else " "
+
+
+def minify_css(css: str) -> str:
+    return _CSS_TOKEN.sub(_css_token, css).strip()
+
+
+def _raw(element: str) -> str:
+    # element comes without its leading "<". <style> and JSON <script> bodies are compacted;
+    # everything else is copied verbatim.
+    tag, attrs, body = _RAW.match(element).groups()
+    tag_lower = tag.lower()
+    if tag_lower == "style":
+        body = minify_css(body)
+    elif tag_lower == "script" and "\n" in body and _JSON_TYPE.search(attrs):
+        try:
+            body = dumps_json(json.loads(body))
+        except ValueError:
+            return "<" + element
+    else:
+        return "<" + element
+    return f"<{tag}{attrs}>{body}</{tag}>"
+
+
+def minify_html(page: str) -> str:
+    """Minify one HTML document (or fragment)."""
+    parts = _TOKENS.split(page)
+    last = len(parts) - 1
+    out = []
+    block_before = False
+    for i in range(0, last + 1, 4):
+        text = parts[i]
+        block = parts[i + 3] if i < last else None
+        if text:
+            if block_before:
+                text = text.lstrip(_SPACE)
+            if block is not None:
+                text = text.rstrip(_SPACE)
+            if "\n" in text:
+                text = _NEWLINE_SPACE.sub(" ", text)
+            out.append(text)
+        if block is not None:
+            out.append("<" + block)
+        elif i < last and parts[i + 2] is not None:
+            out.append(_raw(parts[i + 2]))
+        block_before = block is not None
+    return "".join(out)
+
+
+def print_report(bytes_in: int, bytes_out: int, label: str = "minify"):
+    """One summary line: HTML bytes before and after minification."""
+    saved = bytes_in - bytes_out
+    share = f" ({saved / bytes_in:.0%})" if bytes_in else ""
+    print(f"[{label}] HTML {bytes_in:,} -> {bytes_out:,} bytes; saved {saved:,} bytes{share}")
@@ -0,0 +1,349 @@
+# name_data.py
+# Shared, load-once access to the name catalogue used by generate_name_pages.py
+# and auto_generate.py.
+#
+# names.csv (name,meaning,origin,gender,traits,pronunciation) is the source of
+# truth for a name's meaning, origin and gender. names_master.txt is the plain
+# list of names auto_generate.py publishes. NameCatalogue indexes both by a
+# case-insensitive key so every lookup is a single dict access.
+#
+# Parsing is cached: the normalized rows/names of each source file are kept as a
+# marshal snapshot under .catalogue-cache/, keyed on the file's size, mtime and
+# SHA-256, so later runs skip csv parsing and row cleaning until the file changes.
+
+import csv
+import hashlib
+import marshal
+import os
+import time
+from functools import lru_cache
+from pathlib import Path
+
+ROOT = Path(__file__).parent.resolve()
+CSV_FILE = ROOT / "names.csv"
+MASTER_FILE = ROOT / "names_master.txt"
+SNAPSHOT_DIR = ROOT / ".catalogue-cache"
+SNAPSHOT_VERSION = 1
+# A source modified this close to when its snapshot was taken may have changed within the
+# same mtime tick, so its size/mtime alone are not trusted (the content hash decides).
+RACY_WINDOW_NS = 2_000_000_000
+
+# Longer hand-written descriptions, used for names that names.csv does not cover.
+CURATED_DESCRIPTIONS = {
+    "arjun": "Arjun means bright, shining, or white. Symbolizes courage, heroism, and intelligence.",
+    "aarav": "Aarav means peace, calmness, and wisdom. Associated with a peaceful and intelligent personality.",
+    "vivaan": "Vivaan means full of life, energy, and vibrance. Represents enthusiasm and freshness.",
+    "krish": "Krish is short for Krishna, meaning one who attracts. Represents charm, love, and positivity.",
+    "shivansh": "Shivansh means a part of Lord Shiva. Symbolizes strength, spirituality, and deep inner power.",
+    "keshav": "Keshav is a name of Krishna, meaning one with beautiful hair. Represents love and kindness.",
+    "rudra": "Rudra is a form of Shiva, symbolizing power, storm, and transformation.",
+    "arnav": "Arnav means ocean or sea, symbolizing depth, vastness, and emotional strength.",
+    "yash": "Yash means fame, success, and glory. Represents achievement and recognition.",
+    "lakshay": "Lakshay means target or aim. Symbolizes ambition, focus, and direction.",
+    "priya": "Priya means beloved, dear one. Symbolizes affection, warmth, and kindness.",
+    "diya": "Diya means lamp or light. Represents brightness, hope, and positivity.",
+    "advika": "Advika means unique or one of a kind. Symbolizes individuality and uniqueness.",
+    "ishika": "Ishika means paintbrush or sacred arrow. Represents creativity and purpose.",
+    "anvi": "Anvi is a name of Goddess Lakshmi, meaning kind and compassionate.",
+    "radha": "Radha symbolizes devotion, love, and purity as the consort of Lord Krishna.",
+    "charvi": "Charvi means beautiful and charming. Represents grace and inner beauty.",
+    "tanvi": "Tanvi means delicate and beautiful girl. Represents elegance and softness.",
+    "nidhi": "Nidhi means treasure or wealth. Represents abundance and prosperity.",
+    "manya": "Manya means worthy of honor and respect.",
+    "ali": "Ali means high, elevated, or champion. Symbolizes strength and honor.",
+    "yusuf": "Yusuf means God increases. Represents blessings, growth, and prosperity.",
+    "ahmed": "Ahmed means highly praised or one who constantly thanks God.",
+    "imran": "Imran means prosperity or exaltation. A respected and traditional name.",
+    "omar": "Omar means flourishing, long-lived, or eloquent speaker.",
+    "kabir": "Kabir means great or noble. Symbolizes wisdom and spiritual strength.",
+    "rehan": "Rehan means sweet basil, fragrance, or kingly. Represents freshness and grace.",
+    "faisal": "Faisal means decisive, strong judge, or one who settles arguments.",
+    "muhammad": "Muhammad means the praised one. The name of the Prophet, symbolizing high respect.",
+    "zara": "Zara means princess, flower, or shining star. Represents elegance and brightness.",
+    "ayesha": "Ayesha means lively, prosperous, or life. A respected Islamic name.",
+    "noor": "Noor means light or radiance. Represents guidance and illumination.",
+    "sara": "Sara means princess or noblewoman. Represents purity and grace.",
+    "maryam": "Maryam means beloved, pure, or elevated. The mother of Isa (Jesus).",
+    "sana": "Sana means brilliance, radiance, or praise.",
+    "meera": "Meera symbolizes devotion to Lord Krishna. Represents love and spirituality.",
+    "ira": "Ira means earth or speech. Associated with Goddess Saraswati in some traditions.",
+    "kavya": "Kavya means poetry. Represents artistic talent and creativity.",
+    "saanvi": "Saanvi is a name of Goddess Lakshmi, symbolizing beauty and prosperity.",
+    "myra": "Myra means beloved, admirable, or sweet.",
+    "anika": "Anika means graceful and brilliant. Linked to Goddess Durga.",
+    "riya": "Riya means singer or graceful. Represents charm and expression.",
+    "tara": "Tara means star. Represents guidance, light, and hope.",
+    "samaira": "Samaira means enchanting or protected.",
+    "arohi": "Arohi means ascending or musical tune.",
+    "isha": "Isha is another name of Goddess Parvati, meaning protector or supreme.",
+    "aditi": "Aditi means boundless and motherly. Associated with freedom.",
+    "shruti": "Shruti means musical note or sound. Represents knowledge.",
+    "divya": "Divya means divine or heavenly.",
+    "tejas": "Tejas means brilliance, sharpness, or glow.",
+    "aryan": "Aryan means noble or honorable.",
+    "ansh": "Ansh means portion or part of.",
+    "dev": "Dev means god or divine.",
+    "vihaan": "Vihaan means dawn or beginning of a new era.",
+    "ishaan": "Ishaan means sun or Lord Shiva.",
+    "shaurya": "Shaurya means bravery or heroism.",
+    "dhruv": "Dhruv means pole star, symbolizing stability.",
+    "atharv": "Atharv means wise or learned.",
+    "raghav": "Raghav means descendant of King Raghu.",
+    "rohan": "Rohan means ascending or sandalwood.",
+    "manav": "Manav means human or humane.",
+    "naman": "Naman means salutation or respect.",
+    "varun": "Varun means lord of water.",
+    "kartik": "Kartik is associated with Lord Murugan.",
+    "gautam": "Gautam means bright or enlightened (Gautam Buddha).",
+    "siddharth": "Siddharth means one who has attained enlightenment.",
+    "nikhil": "Nikhil means complete or whole.",
+    "kunal": "Kunal means lotus.",
+    "simran": "Simran means remembrance (of God).",
+    "neha": "Neha means love, rain, or affection.",
+    "ritika": "Ritika means movement or stream.",
+    "parth": "Parth means warrior prince (Arjuna).",
+    "reyansh": "Reyansh means ray of light or part of Lord Vishnu.",
+    "ishita": "Ishita means mastery, excellence.",
+    "jhanvi": "Jhanvi means Ganga river.",
+    "kritika": "Kritika means star or creativity.",
+    "tanisha": "Tanisha means ambitious or desire.",
+    "harsh": "Harsh means happiness or joy.",
+    "aditya": "Aditya means sun or son of Aditi.",
+    "samar": "Samar means battle or companion in war.",
+    "ranveer": "Ranveer means brave warrior.",
+    "rahul": "Rahul means conqueror of miseries.",
+    "harshit": "Harshit means joyous or happy.",
+    "devansh": "Devansh means part of God.",
+    "hridaan": "Hridaan means great heart or kind-hearted.",
+    "ayaan": "Ayaan means blessing or gift of God.",
+}
+
+
+def name_key(name: str) -> str:
+    """Case-insensitive lookup key for a name."""
+    return (name or "").strip().casefold()
+
+
+def clean_row(raw: dict) -> dict:
+    """Lowercase/strip the keys and strip the values of one csv.DictReader row."""
+    row = {}
+    for k, v in raw.items():
+        if k is None:
+            continue
+        row[(k or "").strip().lower()] = (v or "").strip()
+    return row
+
+
+def iter_csv_rows(path: Path = CSV_FILE):
+    """Yield cleaned rows from names.csv, skipping completely empty ones."""
+    if not path.exists():
+        print(f"ERROR: CSV file not found at {path}. Create a CSV with columns: name,meaning,origin,gender,traits,pronunciation")
+        return
+    with open(path, newline='', encoding='utf-8') as f:
+        for raw in csv.DictReader(f):
+            row = clean_row(raw)
+            if any(value for value in row.values()):
+                yield row
+
+
+# ---- Parsed snapshots ----
+def file_digest(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def set_snapshot_dir(directory: Path):
+    """Keep snapshots under `directory` instead of .catalogue-cache/ next to this module."""
+    global SNAPSHOT_DIR
+    SNAPSHOT_DIR = Path(directory)
+
+
+def snapshot_path(source: Path, kind: str) -> Path:
+    """Where the parsed snapshot of one source file is kept."""
+    tag = hashlib.sha256(str(source.resolve()).encode("utf-8")).hexdigest()[:12]
+    return SNAPSHOT_DIR / f"{source.name}-{kind}-{tag}.snapshot"
+
+
+def load_snapshot(source: Path, kind: str):
+    """The cached payload for `source` if it still matches the file, else None. A size/mtime
+    match is trusted; otherwise the file is hashed, and an unchanged hash refreshes the stamp."""
+    try:
+        stat = source.stat()
+        with open(snapshot_path(source, kind), "rb") as f:
+            # The header is its own marshal record, so a stale snapshot is rejected unread.
+            version, size, mtime_ns, digest, taken_ns = marshal.load(f)
+            if version != (SNAPSHOT_VERSION, marshal.version) or size != stat.st_size:
+                return None
+            if mtime_ns == stat.st_mtime_ns and mtime_ns + RACY_WINDOW_NS <= taken_ns:
+                return marshal.loads(f.read())
+            if digest != file_digest(source):
+                return None
+            payload = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    save_snapshot(source, kind, payload, digest, stat)
+    return payload
+
+
+def save_snapshot(source: Path, kind: str, payload, digest: str = None, stat=None):
+    """Store the parsed payload of `source`. Pass the digest/stat taken before parsing, so an
+    edit made while parsing leaves a snapshot that no longer matches the file."""
+    path = snapshot_path(source, kind)
+    try:
+        stat = stat or source.stat()
+        header = ((SNAPSHOT_VERSION, marshal.version), stat.st_size, stat.st_mtime_ns,
+                  digest or file_digest(source), time.time_ns())
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            marshal.dump(header, f)
+            marshal.dump(payload, f)
+        os.replace(tmp, path)
+    except (OSError, ValueError):
+        pass  # a read-only checkout just parses the source again next time
+
+
+def csv_snapshot(path: Path = CSV_FILE):
+    """(header, set of raw data lines) of names.csv, so edits can be diffed line by line."""
+    if not path.exists():
+        return "", frozenset()
+    with open(path, newline='', encoding='utf-8') as f:
+        header = f.readline().rstrip("\r\n")
+        lines = frozenset(line.rstrip("\r\n") for line in f)
+    return header, lines - {""}
+
+
+def diff_csv(old, new):
+    """Rows that disappeared and rows that appeared between two csv_snapshot()s, each as
+    {name_key: row}; a key in both is a changed row. Returns None when the line diff cannot
+    be trusted (header changed, or a quoted field spans lines) and the file must be reread."""
+    (old_header, old_lines), (new_header, new_lines) = old, new
+    if old_header != new_header:
+        return None
+    changed = (old_lines - new_lines, new_lines - old_lines)
+    if any(line.count('"') % 2 for lines in changed for line in lines):
+        return None
+    removed, added = ({}, {})
+    for lines, out in zip(changed, (removed, added)):
+        for raw in csv.DictReader([new_header, *sorted(lines)]):
+            row = clean_row(raw)
+            key = name_key(row.get("name"))
+            if key:
+                out[key] = row
+    return removed, added
+
+
+def iter_master_names(path: Path = MASTER_FILE):
+    """Yield names from names_master.txt, dropping blanks and case-insensitive duplicates."""
+    if not path.exists():
+        return
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            name = line.strip()
+            key = name_key(name)
+            if name and key not in seen:
+                seen.add(key)
+                yield name
+
+
+def cached_csv_rows(path: Path = CSV_FILE, refresh: bool = False):
+    """iter_csv_rows() through the snapshot cache: rows come from the snapshot while names.csv
+    is unchanged; otherwise the file is parsed (streaming) and the snapshot rewritten. The
+    snapshot stores the header once and each row as a tuple of its values."""
+    if not path.exists():
+        yield from iter_csv_rows(path)
+        return
+    cached = None if refresh else load_snapshot(path, "rows")
+    if cached is not None:
+        fields, values = cached
+        for row in values:
+            yield dict(zip(fields, row))
+        return
+    stat, digest = path.stat(), file_digest(path)
+    fields, values = None, []
+    for row in iter_csv_rows(path):
+        if fields is None:
+            fields = tuple(row)
+        values.append(tuple(row.values()))
+        yield row
+    save_snapshot(path, "rows", (fields or (), values), digest, stat)
+
+
+def cached_master_names(path: Path = MASTER_FILE, refresh: bool = False) -> list:
+    """iter_master_names() as a list, through the snapshot cache."""
+    if not path.exists():
+        return []
+    names = None if refresh else load_snapshot(path, "names")
+    if names is None:
+        stat, digest = path.stat(), file_digest(path)
+        names = list(iter_master_names(path))
+        save_snapshot(path, "names", names, digest, stat)
+    return names
+
+
+class NameCatalogue:
+    """names.csv rows and names_master.txt names indexed by name_key()."""
+
+    def __init__(self, rows, master_names=()):
+        self.rows = list(rows)
+        self.master_names = list(master_names)
+        self._by_key = {}
+        for row in self.rows:
+            key = name_key(row.get("name"))
+            if key:
+                self._by_key[key] = row  # later rows win, as they overwrite the same page
+
+    @classmethod
+    def load(cls, csv_path: Path = CSV_FILE, master_path: Path = MASTER_FILE) -> "NameCatalogue":
+        return cls(cached_csv_rows(csv_path), cached_master_names(master_path))
+
+    def __contains__(self, name) -> bool:
+        return name_key(name) in self._by_key
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    def get(self, name: str):
+        """The names.csv row for a name, or None."""
+        return self._by_key.get(name_key(name))
+
+    def _field(self, name: str, field: str) -> str:
+        row = self._by_key.get(name_key(name))
+        return row.get(field, "") if row else ""
+
+    def meaning(self, name: str) -> str:
+        return self._field(name, "meaning")
+
+    def origin(self, name: str) -> str:
+        return self._field(name, "origin")
+
+    def gender(self, name: str) -> str:
+        return self._field(name, "gender")
+
+    def describe(self, name: str) -> str:
+        """Prose meaning for a name: names.csv first, then the curated text, then a generic line."""
+        proper = name.strip().capitalize()
+        meaning = self.meaning(name)
+        if meaning:
+            text = f"{proper} means {meaning}."
+            origin = self.origin(name)
+            if origin:
+                text += f" It is a name of {origin} origin."
+            return text
+        curated = CURATED_DESCRIPTIONS.get(name_key(name))
+        if curated:
+            return curated
+        return (
+            f"The name {proper} is associated with positivity, individuality, and a strong personality. "
+            f"It reflects confidence and a unique identity."
+        )
+
+
+@lru_cache(maxsize=None)
+def load_catalogue(csv_path: Path = CSV_FILE, master_path: Path = MASTER_FILE) -> NameCatalogue:
+    """Process-wide cached catalogue; the files are parsed at most once per path pair."""
+    return NameCatalogue.load(csv_path, master_path)
@@ -0,0 +1,147 @@
+# output_writer.py
+# Buffered, concurrent, atomic file writes for generated output, shared by
+# generate_name_pages.py and auto_generate.py.
+#
+# Writes are queued onto a small thread pool (file I/O releases the GIL, and on a
+# network-backed volume latency dominates). Each file is written to a temporary name
+# in the same directory and renamed into place, so an interrupted build never leaves
+# a half-written page behind. A write whose bytes already match the file on disk is
+# skipped, leaving the file and its mtime alone. With minify on, .html files go through
+# html_minify.minify_html() before they are queued.
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from build_metrics import metrics
+from html_minify import minify_html
+
+DEFAULT_IO_WORKERS = 8
+
+
+def write_atomic(path: Path, data: bytes) -> tuple:
+    """Write data to path via a temp file + rename. Returns (existed, written)."""
+    path = Path(path)
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        existed = False
+    else:
+        existed = True
+        if size == len(data) and path.read_bytes() == data:
+            return True, False
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+    return existed, True
+
+
+class OutputWriter:
+    """Queue of atomic, skip-if-identical file writes on a bounded thread pool.
+
+    write() returns a Future resolving to (existed, written); at most `max_pending` writes are
+    queued at once, so a fast producer blocks instead of buffering the whole site in memory.
+    """
+
+    def __init__(self, workers: int = DEFAULT_IO_WORKERS, max_pending: int = None, minify: bool = False):
+        self.workers = max(1, workers)
+        self.minify = minify
+        self.pid = os.getpid()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="writer")
+        self._slots = threading.BoundedSemaphore(max_pending or self.workers * 8)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.closed = False
+        # Set to a list to collect the paths of files actually (re)written, e.g. to precompress them.
+        self.written = None
+
+    def _write(self, path, data, span):
+        start = time.perf_counter()
+        try:
+            existed, written = write_atomic(path, data)
+        finally:
+            metrics.add(span, time.perf_counter() - start)
+        if written:
+            metrics.count("files_written")
+            metrics.count("bytes_written", len(data))
+            if self.written is not None:
+                self.written.append(Path(path))
+        else:
+            metrics.count("files_skipped")
+        return existed, written
+
+    def _minify(self, data):
+        start = time.perf_counter()
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        minified = minify_html(data).encode("utf-8")
+        metrics.add("minify", time.perf_counter() - start)
+        metrics.count("minify_bytes_in", len(data.encode("utf-8")))
+        metrics.count("minify_bytes_out", len(minified))
+        return minified
+
+    def write(self, path: Path, data, span: str = "write_file"):
+        """Queue one file; str data is encoded as UTF-8."""
+        if self.minify and str(path).endswith(".html"):
+            data = self._minify(data)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._slots.acquire()
+        try:
+            future = self._pool.submit(self._write, path, data, span)
+        except BaseException:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+        self._slots.release()
+
+    def flush(self):
+        """Wait for every queued write; re-raise the first failure."""
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.closed = True
+            self._pool.shutdown(wait=True)
+
+
+_shared = None
+
+
+def shared_writer(workers: int = None, minify: bool = None) -> OutputWriter:
+    """The process-wide writer (recreated after a fork, since pool threads do not survive it).
+
+    A replacement writer keeps the previous one's minify setting unless `minify` is given.
+    """
+    global _shared
+    if minify is None:
+        minify = _shared.minify if _shared is not None else False
+    if (_shared is None or _shared.closed or _shared.pid != os.getpid() or (workers and workers != _shared.workers)
+            or minify != _shared.minify):
+        if _shared is not None and not _shared.closed and _shared.pid == os.getpid():
+            _shared.close()
+        _shared = OutputWriter(workers or DEFAULT_IO_WORKERS, minify=minify)
+    return _shared
@@ -0,0 +1,62 @@
+# page_templates.py
+# Precompiled page templates and content-hashed shared stylesheets, used by
+# generate_name_pages.py and auto_generate.py.
+#
+# A template is plain text with {{slot}} placeholders. It is split into literal
+# segments once; rendering only joins the literals with the per-page values.
+# Site-wide values (site URL, stylesheet link, ...) can be baked in ahead of time
+# with bind(), leaving only the per-name slots to fill on every page.
+
+import hashlib
+import re
+from pathlib import Path
+
+SLOT_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+class Template:
+    """Text split into literal segments and named slots."""
+
+    def __init__(self, source: str):
+        parts = SLOT_RE.split(source)
+        self.literals = parts[0::2]
+        self.slots = parts[1::2]
+
+    def bind(self, **values) -> "Template":
+        """Return a copy with the given slots folded into the literal segments."""
+        literals = [self.literals[0]]
+        slots = []
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            if slot in values:
+                literals[-1] += str(values[slot]) + literal
+            else:
+                slots.append(slot)
+                literals.append(literal)
+        bound = Template.__new__(Template)
+        bound.literals = literals
+        bound.slots = slots
+        return bound
+
+    def render(self, **values) -> str:
+        """Fill every remaining slot; a missing value raises KeyError."""
+        out = [self.literals[0]]
+        for slot, literal in zip(self.slots, self.literals[1:]):
+            out.append(values[slot])
+            out.append(literal)
+        return "".join(out)
+
+
+def stylesheet_name(css: str, stem: str) -> str:
+    """Fingerprinted file name for a stylesheet, e.g. names.3f2a9c1d.css."""
+    digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:10]
+    return f"{stem}.{digest}.css"
+
+
+def write_stylesheet(css: str, out_dir: Path, stem: str) -> Path:
+    """Write the stylesheet once; an existing file with the same fingerprint is left alone."""
+    path = Path(out_dir) / stylesheet_name(css, stem)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(css, encoding="utf-8")
+        print(f"[assets] Wrote {path}")
+    return path
@@ -0,0 +1,106 @@
+# precompress.py
+# Write precompressed .gz (and .br, when the brotli module is installed) siblings
+# next to generated files, so the static host never has to compress on the fly.
+#
+# Used by generate_name_pages.py and auto_generate.py (--compress), or directly:
+#   python precompress.py public
+
+import argparse
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_SUFFIXES = (".html", ".xml", ".css", ".js", ".json", ".txt")
+
+
+def iter_compressible(root: Path, suffixes=COMPRESSIBLE_SUFFIXES):
+    """Yield every file under root worth precompressing."""
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith(suffixes):
+                yield Path(dirpath) / filename
+
+
+def _is_fresh(variant: Path, source_mtime: float) -> bool:
+    try:
+        return variant.stat().st_mtime >= source_mtime
+    except FileNotFoundError:
+        return False
+
+
+def _write_variant(variant: Path, payload: bytes, source_mtime: float):
+    tmp = variant.with_name(variant.name + ".tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, variant)
+    # Match the source mtime so freshness checks and deploy diffs stay stable.
+    os.utime(variant, (source_mtime, source_mtime))
+
+
+def compress_file(path: Path, force: bool = False) -> dict:
+    """Compress one file; variants newer than the source are left alone."""
+    path = Path(path)
+    source_mtime = path.stat().st_mtime
+    result = {"path": str(path), "size": path.stat().st_size, "gz": None, "br": None, "skipped": True}
+    variants = [("gz", path.with_name(path.name + ".gz"))]
+    if brotli is not None:
+        variants.append(("br", path.with_name(path.name + ".br")))
+    data = None
+    for kind, variant in variants:
+        if not force and _is_fresh(variant, source_mtime):
+            result[kind] = variant.stat().st_size
+            continue
+        if data is None:
+            data = path.read_bytes()
+        if kind == "gz":
+            payload = gzip.compress(data, compresslevel=9, mtime=0)
+        else:
+            payload = brotli.compress(data, quality=11)
+        _write_variant(variant, payload, source_mtime)
+        result[kind] = len(payload)
+        result["skipped"] = False
+    return result
+
+
+def compress_outputs(paths, workers: int = None, force: bool = False) -> list:
+    """Compress many files on a thread pool (zlib and brotli release the GIL)."""
+    paths = list(paths)
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=workers or min(32, (os.cpu_count() or 1) + 4)) as pool:
+        return list(pool.map(lambda p: compress_file(p, force), paths))
+
+
+def print_report(results: list, label: str = "compress"):
+    """One summary line: files touched, and total bytes before/after per encoding."""
+    written = sum(1 for r in results if not r["skipped"])
+    original = sum(r["size"] for r in results)
+    line = f"[{label}] {len(results)} files ({written} compressed, {len(results) - written} up to date); " \
+           f"original {original:,} bytes"
+    for kind in ("gz", "br"):
+        sizes = [r[kind] for r in results if r[kind] is not None]
+        if sizes:
+            total = sum(sizes)
+            line += f"; .{kind} {total:,} bytes ({total / original:.0%})" if original else f"; .{kind} {total:,} bytes"
+    if brotli is None:
+        line += " (install 'brotli' for .br output)"
+    print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write .gz/.br siblings for generated static files.")
+    parser.add_argument("roots", nargs="+", type=Path, help="directories to walk")
+    parser.add_argument("--workers", type=int, default=None, help="compression threads")
+    parser.add_argument("--force", action="store_true", help="recompress even if siblings are up to date")
+    args = parser.parse_args(argv)
+    paths = [p for root in args.roots for p in iter_compressible(root)]
+    print_report(compress_outputs(paths, args.workers, args.force))
+
+
+if __name__ == "__main__":
+    main()
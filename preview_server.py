@@ -0,0 +1,310 @@
+# preview_server.py
+# Local preview of the site without running a build.
+#
+# Name pages, category pages, letter pages and sitemaps are rendered on request with the
+# same code generate_name_pages.py uses (build_html, render_category_page,
+# render_letter_page, sitemap_entry), and kept in a bounded LRU cache with ETags, so an
+# unchanged page answers If-None-Match with 304. The server listens immediately; names.csv
+# is read (and the related-names index built) once, on a background thread, and the first
+# rendered request waits for it. Anything else is served from public/ as a static file.
+# Links to the production site URL are rewritten to point at the preview server.
+#
+#   python preview_server.py                 # then open http://127.0.0.1:8000/names/aarav.html
+
+import argparse
+import hashlib
+import mimetypes
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import generate_name_pages as site
+from related_names import RelatedIndex
+
+DEFAULT_PORT = 8000
+DEFAULT_CACHE_SIZE = 512
+
+NAME_PAGE_RE = re.compile(r"/names/([^/]+)\.html")
+CATEGORY_PAGE_RE = re.compile(r"/categories/(.+?)(?:-page-(\d+))?\.html")
+LETTER_PAGE_RE = re.compile(r"/names-([a-z])(?:-page-(\d+))?\.html")
+SITEMAP_RE = re.compile(r"/(sitemap-[a-z]+(?:-\d+)?\.xml)")
+
+
+class LRUCache:
+    """Thread-safe, size-bounded mapping that evicts the least recently used entry."""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+
+class PreviewSite:
+    """names.csv loaded once, plus renderers for every generated URL."""
+
+    def __init__(self, csv_path=None, related_k: int = 6, seed: str = "",
+                 page_size: int = site.CATEGORY_PAGE_SIZE):
+        self.csv_path = csv_path or site.CSV_FILE
+        self.related_k = related_k
+        self.seed = seed
+        self.page_size = page_size
+        self.ready = threading.Event()
+        self.error = None
+        self._sitemaps = None
+        self._sitemap_lock = threading.Lock()
+        threading.Thread(target=self._load, name="catalogue-loader", daemon=True).start()
+
+    def _load(self):
+        try:
+            self.today = site.source_date(self.csv_path)
+            self.rows = {}
+            facets = defaultdict(list)
+            letters = defaultdict(list)
+            self.related_index = RelatedIndex()
+            for seq, row in enumerate(site.iter_csv(self.csv_path)):
+                name = (row.get("name") or "").strip()
+                if not name:
+                    continue
+                slug = site.slugify(name)
+                # Like the build: a later row with the same slug owns the page.
+                self.rows[slug] = row
+                self.related_index.add(name, slug, row.get("origin", ""), row.get("gender", ""))
+                entry = (name.lower(), seq, f"{site.SITE_URL}/names/{slug}.html", name)
+                for facet in site.row_facets(row):
+                    facets[facet].append(entry)
+                letter = site.name_letter(name)
+                if letter:
+                    letters[letter].append(entry)
+            self.facets = {key: [(url, name) for _k, _s, url, name in sorted(members)]
+                           for key, members in facets.items()}
+            self.letters = {letter: [(url, name) for _k, _s, url, name in sorted(members)]
+                            for letter, members in letters.items()}
+            self.listing = site.category_listing(Counter({key: len(m) for key, m in self.facets.items()}))
+            self.categories = {slug: (kind, label, title, desc) for kind, label, slug, title, desc, _n in self.listing}
+            print(f"[preview] Loaded {len(self.rows):,} names from {self.csv_path}")
+        except Exception as exc:  # surfaced on every request instead of killing the thread silently
+            self.error = exc
+        finally:
+            self.ready.set()
+
+    def _pages(self, n: int) -> int:
+        return max(1, -(-n // self.page_size)) if self.page_size else 1
+
+    def _page_slice(self, items: list, page: int) -> list:
+        if not self.page_size:
+            return items
+        return items[(page - 1) * self.page_size:page * self.page_size]
+
+    # ---- Renderers: each returns (body str, content type) or None ----
+    def name_page(self, slug):
+        row = self.rows.get(slug)
+        if row is None:
+            return None
+        related = self.related_index.related(slug, self.related_k) if self.related_k > 0 else []
+        _slug, body, _lastmod = site.build_html(row, site.page_rng(slug, self.seed),
+                                                site.row_date(row, self.today), related)
+        return body, "text/html; charset=utf-8"
+
+    def category_page(self, slug, page):
+        if slug == "index" and page == 1:
+            return site.render_category_index(self.listing, self.today), "text/html; charset=utf-8"
+        if slug not in self.categories:
+            return None
+        kind, label, title, desc = self.categories[slug]
+        members = self.facets[(kind, label)]
+        pages = self._pages(len(members))
+        if page > pages:
+            return None
+        page_title = title if page == 1 else f"{title} — Page {page}"
+        body = site.render_category_page(page_title, desc, self._page_slice(members, page), self.today,
+                                         (slug, page, pages))
+        return body, "text/html; charset=utf-8"
+
+    def letter_page(self, letter, page):
+        members = self.letters.get(letter, [])
+        pages = self._pages(len(members))
+        if page > pages:
+            return None
+        body = site.render_letter_page(letter, self._page_slice(members, page), page, pages, self.today)
+        return body, "text/html; charset=utf-8"
+
+    def sitemaps(self):
+        # {shard file name: (kind, shard, [(loc, lastmod)])}. Shards are filled in catalogue order
+        # up to SITEMAP_MAX_URLS each; the build's SitemapStore may place URLs differently.
+        with self._sitemap_lock:
+            if self._sitemaps is None:
+                today = self.today.isoformat()
+                urls = [(f"{site.SITE_URL}/names/{slug}.html", site.row_date(row, self.today).isoformat())
+                        for slug, row in self.rows.items()]
+                for letter in site.LETTERS:
+                    for page in range(1, self._pages(len(self.letters.get(letter, []))) + 1):
+                        urls.append((f"{site.SITE_URL}/{site.page_file_name(f'names-{letter}', page)}", today))
+                for _kind, _label, slug, _title, _desc, n in self.listing:
+                    for page in range(1, self._pages(n) + 1):
+                        urls.append((f"{site.SITE_URL}/categories/{site.page_file_name(slug, page)}", today))
+                urls.append((f"{site.SITE_URL}/categories/index.html", today))
+                shards = defaultdict(list)
+                for loc, lastmod in urls:
+                    kind = site.sitemap_kind(loc)
+                    shard = len(shards[kind]) // site.SITEMAP_MAX_URLS + 1
+                    shards[kind].append((shard, loc, lastmod))
+                self._sitemaps = {}
+                for kind, entries in shards.items():
+                    for shard, loc, lastmod in entries:
+                        name = site.sitemap_shard_name(kind, shard)
+                        self._sitemaps.setdefault(name, (kind, shard, []))[2].append((loc, lastmod))
+            return self._sitemaps
+
+    def sitemap(self, name):
+        shard = self.sitemaps().get(name)
+        if shard is None:
+            return None
+        body = site.SITEMAP_XML_HEAD + "".join(site.sitemap_entry(loc, lastmod) for loc, lastmod in shard[2]) \
+            + site.SITEMAP_XML_FOOT
+        return body, "application/xml; charset=utf-8"
+
+    def sitemap_index(self):
+        rows = [(kind, shard, len(entries), max(lastmod for _loc, lastmod in entries), 0)
+                for kind, shard, entries in self.sitemaps().values()]
+        return site.render_sitemap_index(rows, self.today), "application/xml; charset=utf-8"
+
+    def render(self, path: str):
+        """Render a request path, or None if it is not a generated page."""
+        m = NAME_PAGE_RE.fullmatch(path)
+        if m and m.group(1) != "index":
+            return self.name_page(m.group(1))
+        m = CATEGORY_PAGE_RE.fullmatch(path)
+        if m:
+            return self.category_page(m.group(1), int(m.group(2) or 1))
+        m = LETTER_PAGE_RE.fullmatch(path)
+        if m:
+            return self.letter_page(m.group(1), int(m.group(2) or 1))
+        if path == "/sitemap_index.xml":
+            return self.sitemap_index()
+        m = SITEMAP_RE.fullmatch(path)
+        if m:
+            return self.sitemap(m.group(1))
+        return None
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    server_version = "NamePreview/1.0"
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        path = unquote(urlsplit(self.path).path)
+        if path.endswith("/"):
+            path += "index.html"
+        response = self.server.cache.get(path)
+        if response is None:
+            response = self.build_response(path)
+            if response is None:
+                self.send_error(404, "Not found")
+                return
+            if response[0] == 200 and response[4]:
+                self.server.cache.put(path, response)
+        status, body, ctype, etag, _cacheable = response
+        if status != 200:
+            self.send_error(status, body.decode("utf-8", "replace"))
+            return
+        if etag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def build_response(self, path):
+        # (status, body bytes, content type, etag, cacheable), or None for a 404. Static files are
+        # not cached, so edits under public/ show up on the next request.
+        preview = self.server.preview
+        rendered = None
+        cacheable = True
+        if any(r.fullmatch(path) for r in (NAME_PAGE_RE, CATEGORY_PAGE_RE, LETTER_PAGE_RE, SITEMAP_RE)) \
+                or path == "/sitemap_index.xml":
+            preview.ready.wait()
+            if preview.error:
+                return 500, f"Could not load {preview.csv_path}: {preview.error}".encode("utf-8"), "text/plain", "", False
+            rendered = preview.render(path)
+        if rendered is None:
+            rendered = self.static_file(path)
+            cacheable = False
+            if rendered is None:
+                return None
+        body, ctype = rendered
+        if isinstance(body, str):
+            body = body.replace(site.SITE_URL, self.server.base_url).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        return 200, body, ctype, etag, cacheable
+
+    def static_file(self, path):
+        target = (site.PUBLIC_DIR / path.lstrip("/")).resolve()
+        if site.PUBLIC_DIR.resolve() not in target.parents or not target.is_file():
+            return None
+        ctype = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+        if ctype.startswith("text/") or ctype in ("application/json", "application/javascript", "application/xml"):
+            return target.read_text(encoding="utf-8"), f"{ctype}; charset=utf-8"
+        return target.read_bytes(), ctype
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the name site, rendering pages on request.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help=f"rendered responses kept in memory (default {DEFAULT_CACHE_SIZE})")
+    parser.add_argument("--related", type=int, default=6, help="related-name links per page (0 = none)")
+    parser.add_argument("--seed", default="", help="same as generate_name_pages --deterministic --seed")
+    parser.add_argument("--category-page-size", type=int, default=site.CATEGORY_PAGE_SIZE,
+                        help="names per category/letter page (0 = never split)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = ThreadingHTTPServer((args.host, args.port), PreviewHandler)
+    server.daemon_threads = True
+    server.preview = PreviewSite(site.CSV_FILE, args.related, args.seed, args.category_page_size)
+    server.cache = LRUCache(args.cache_size)
+    server.base_url = f"http://{args.host}:{server.server_address[1]}"
+    print(f"[preview] Serving on {server.base_url}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"[preview] Cache hits: {server.cache.hits}, misses: {server.cache.misses}")
+
+
+if __name__ == "__main__":
+    main()
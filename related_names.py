@@ -0,0 +1,220 @@
+# related_names.py
+# "Related names" for every name in the catalogue, without comparing all pairs.
+#
+# Each name is indexed under its character trigrams and a phonetic key. Candidates
+# for a name are its best trigram matches, the names sharing its phonetic key, and a
+# few neighbours from its origin/gender bucket. Very common trigrams (postings longer than MAX_POSTING) are
+# skipped, so the work per name stays bounded and the whole catalogue is processed
+# in near-linear time. Candidates are scored by trigram overlap, phonetic match,
+# shared origin, gender and length bucket.
+#
+# Results do not depend on the order names were added in: trigram postings, phonetic lists
+# and buckets are kept in slug order and trigrams are visited sorted, so every tie falls the
+# same way. An index edited with remove()/add() therefore answers exactly like one built
+# from scratch, and affected() bounds which names an edit can change.
+
+import heapq
+from bisect import bisect_left
+import unicodedata
+from collections import Counter, defaultdict
+
+MAX_POSTING = 300
+MAX_PHONETIC = 50
+BUCKET_NEIGHBOURS = 8
+# Only this many times k of the best trigram matches are fully scored.
+CANDIDATE_FACTOR = 8
+
+WEIGHT_NGRAM = 4.0
+WEIGHT_PHONETIC = 2.0
+WEIGHT_ORIGIN = 1.5
+WEIGHT_GENDER = 1.0
+WEIGHT_LENGTH = 0.5
+
+# Spelling variants that sound alike in romanized Indian, Arabic and English names.
+_PHONETIC_RULES = [
+    ("aa", "a"), ("ee", "i"), ("ii", "i"), ("oo", "u"), ("uu", "u"),
+    ("sh", "s"), ("kh", "k"), ("gh", "g"), ("th", "t"), ("dh", "d"),
+    ("ph", "f"), ("bh", "b"), ("w", "v"), ("z", "j"), ("q", "k"),
+]
+_SOUNDEX = {}
+for _letters, _code in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"), ("l", "4"), ("mn", "5"), ("r", "6")):
+    for _c in _letters:
+        _SOUNDEX[_c] = _code
+
+
+def ascii_key(name: str) -> str:
+    """Lowercase ASCII letters of a name, accents stripped."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    return "".join(c for c in decomposed if c.isascii() and c.isalpha()).lower()
+
+
+def ngrams(key: str, n: int = 3) -> set:
+    padded = f"^{key}$"
+    return {padded[i:i + n] for i in range(max(1, len(padded) - n + 1))}
+
+
+def phonetic_key(name: str) -> str:
+    """Soundex-style code after folding common romanization variants."""
+    key = ascii_key(name)
+    for a, b in _PHONETIC_RULES:
+        key = key.replace(a, b)
+    if not key:
+        return ""
+    codes = [key[0]]
+    last = _SOUNDEX.get(key[0], "")
+    for c in key[1:]:
+        code = _SOUNDEX.get(c, "")
+        if code and code != last:
+            codes.append(code)
+        last = code
+    return "".join(codes)[:4]
+
+
+def gender_key(gender: str) -> str:
+    g = (gender or "").strip().lower()
+    if g in ("male", "m"):
+        return "m"
+    if g in ("female", "f"):
+        return "f"
+    return "u"
+
+
+def length_bucket(name: str) -> int:
+    n = len((name or "").replace(" ", ""))
+    return 0 if n <= 4 else 1 if n <= 7 else 2
+
+
+class RelatedIndex:
+    """Inverted trigram/phonetic index over (name, slug, origin, gender) entries."""
+
+    def __init__(self):
+        self._entries = []        # id -> (name, slug, grams, phonetic, origin, gender, length)
+        self._by_slug = {}        # slug -> id
+        self._slugs = []          # id -> slug
+        # Trigram postings hold ids, phonetic lists and origin/gender buckets (slug, id) pairs; all
+        # are put in slug order on first use after an add() (appending and sorting once is much
+        # cheaper than inserting in order).
+        self._grams = defaultdict(list)
+        self._phonetic = defaultdict(list)
+        self._buckets = defaultdict(list)
+        self._unsorted_grams = set()
+        self._unsorted = set()
+
+    def add(self, name: str, slug: str, origin: str = "", gender: str = ""):
+        """Index one name; a repeated slug is ignored (the first row owns the page link)."""
+        if slug in self._by_slug:
+            return
+        i = len(self._entries)
+        grams = ngrams(ascii_key(name) or name.lower())
+        phonetic = phonetic_key(name)
+        origin_key = (origin or "").strip().lower()
+        gender = gender_key(gender)
+        self._entries.append((name, slug, grams, phonetic, origin_key, gender, length_bucket(name)))
+        self._by_slug[slug] = i
+        self._slugs.append(slug)
+        for gram in grams:
+            self._grams[gram].append(i)
+        self._unsorted_grams.update(grams)
+        if phonetic:
+            self._phonetic[phonetic].append((slug, i))
+            self._unsorted.add(("p", phonetic))
+        self._buckets[(origin_key, gender)].append((slug, i))
+        self._unsorted.add(("b", (origin_key, gender)))
+
+    def remove(self, slug: str):
+        """Forget the entry with this slug; it is never returned as related again."""
+        i = self._by_slug.pop(slug, None)
+        if i is None:
+            return
+        _name, _slug, grams, phonetic, origin, gender, _length = self._entries[i]
+        for gram in grams:
+            self._grams[gram].remove(i)
+        if phonetic:
+            members = self._sorted(("p", phonetic))
+            del members[bisect_left(members, (slug, i))]
+        members = self._sorted(("b", (origin, gender)))
+        del members[bisect_left(members, (slug, i))]
+
+    def _posting(self, gram) -> list:
+        posting = self._grams[gram]
+        if gram in self._unsorted_grams:
+            posting.sort(key=self._slugs.__getitem__)
+            self._unsorted_grams.discard(gram)
+        return posting
+
+    def _sorted(self, key) -> list:
+        kind, value = key
+        members = (self._phonetic if kind == "p" else self._buckets)[value]
+        if key in self._unsorted:
+            members.sort()
+            self._unsorted.discard(key)
+        return members
+
+    def __len__(self):
+        return len(self._by_slug)
+
+    def affected(self, slug: str) -> set:
+        """Slugs whose related() lists may change when the entry with this slug is added or
+        removed: names in its scored trigram postings (including one at the MAX_POSTING
+        cut-off), in its phonetic list if it falls within the first MAX_PHONETIC, and next to
+        it in its origin/gender bucket. Call it after add() and before remove()."""
+        i = self._by_slug.get(slug)
+        if i is None:
+            return set()
+        _name, _slug, grams, phonetic, origin, gender, _length = self._entries[i]
+        ids = set()
+        for gram in grams:
+            posting = self._grams[gram]
+            if len(posting) <= MAX_POSTING + 1:
+                ids.update(posting)
+        if phonetic:
+            members = self._sorted(("p", phonetic))
+            if bisect_left(members, (slug, i)) < MAX_PHONETIC:
+                ids.update(j for _slug, j in members)
+        members = self._sorted(("b", (origin, gender)))
+        pos = bisect_left(members, (slug, i))
+        reach = BUCKET_NEIGHBOURS // 2 + 1
+        ids.update(j for _slug, j in members[max(0, pos - reach):pos + reach + 1])
+        ids.discard(i)
+        return {self._entries[j][1] for j in ids}
+
+    def related(self, slug: str, k: int = 6) -> list:
+        """Top-k [(name, slug), ...] most similar to the entry with this slug."""
+        i = self._by_slug.get(slug)
+        if i is None or k <= 0:
+            return []
+        name, _slug, grams, phonetic, origin, gender, length = self._entries[i]
+
+        # most_common() keeps first-seen order among equal counts: sorted trigrams over slug-ordered
+        # postings make that order independent of how the index was built.
+        shared = Counter()
+        for gram in sorted(grams):
+            if len(self._grams[gram]) <= MAX_POSTING:
+                shared.update(self._posting(gram))
+        shared.pop(i, None)
+        sounds_alike = [j for _slug, j in self._sorted(("p", phonetic))[:MAX_PHONETIC]] if phonetic else []
+        candidates = {j for j, _count in shared.most_common(k * CANDIDATE_FACTOR)}
+        candidates.update(sounds_alike)
+        # A few same-origin/gender neighbours (by slug) so names with only common trigrams still get links.
+        bucket = self._sorted(("b", (origin, gender)))
+        pos = bisect_left(bucket, (slug, i))
+        reach = BUCKET_NEIGHBOURS // 2
+        candidates.update(j for _s, j in bucket[max(0, pos - reach):pos + reach + 1])
+        candidates.discard(i)
+
+        sounds_alike = set(sounds_alike)
+        scored = []
+        for j in candidates:
+            other_name, other_slug, other_grams, _p, other_origin, other_gender, other_length = self._entries[j]
+            score = WEIGHT_NGRAM * 2 * shared[j] / (len(grams) + len(other_grams))
+            if j in sounds_alike:
+                score += WEIGHT_PHONETIC
+            if origin and other_origin == origin:
+                score += WEIGHT_ORIGIN
+            if other_gender == gender:
+                score += WEIGHT_GENDER
+            if other_length == length:
+                score += WEIGHT_LENGTH
+            scored.append((score, other_name.lower(), other_slug, other_name))
+        best = heapq.nsmallest(k, scored, key=lambda s: (-s[0], s[1], s[2]))
+        return [(other_name, other_slug) for _score, _key, other_slug, other_name in best]
@@ -0,0 +1,57 @@
+# structured_data.py
+# schema.org JSON-LD for generated pages: one minified <script type="application/ld+json">
+# block per page.
+#
+# Parts that are identical on every page of a site (publisher node, language, breadcrumb
+# prefix) are serialized once when the builder is created; per-page values are dumped on
+# their own and spliced in between, so a page never pays for a full json.dumps of its graph.
+# "</" is written as "<\/" (still valid JSON) so no value can close the script element early.
+
+import json
+
+
+def dumps(value) -> str:
+    """Minified JSON that is safe to inline in a <script> element."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def script_block(json_text: str) -> str:
+    return f'<script type="application/ld+json">{json_text}</script>'
+
+
+class StructuredData:
+    """JSON-LD builders for one site (base URL, publisher name, page language)."""
+
+    def __init__(self, site_url: str, author: str, locale: str):
+        self.site_url = site_url
+        # WebPage node after its per-page fields: language and publisher, closing the node.
+        self._webpage_tail = f',"inLanguage":{dumps(locale)},"author":{dumps({"@type": "Organization", "name": author})}}}'
+        self._term_set_tail = f',"inDefinedTermSet":{dumps(site_url)}}}'
+        # Breadcrumb up to the name of the last (per-page) item.
+        crumbs = [
+            {"@type": "ListItem", "position": 1, "name": "Home", "item": site_url + "/"},
+            {"@type": "ListItem", "position": 2, "name": "Names", "item": site_url + "/names/"},
+        ]
+        self._breadcrumb_head = ('{"@type":"BreadcrumbList","itemListElement":['
+                                 + ",".join(dumps(c) for c in crumbs) + ',{"@type":"ListItem","position":3,"name":')
+
+    def name_page(self, name: str, page_url: str, summary: str, meaning: str) -> str:
+        """WebPage + DefinedTerm + BreadcrumbList graph for one name page."""
+        name_json = dumps(name)
+        url_json = dumps(page_url)
+        return script_block(
+            '{"@context":"https://schema.org","@graph":['
+            f'{{"@type":"WebPage","@id":{url_json},"name":{name_json},"description":{dumps(summary)},'
+            f'"url":{url_json}{self._webpage_tail},'
+            f'{{"@type":"DefinedTerm","name":{name_json},"description":{dumps(meaning)}{self._term_set_tail},'
+            f'{self._breadcrumb_head}{name_json},"item":{url_json}}}]}}]}}'
+        )
+
+    def item_list(self, name: str, items) -> str:
+        """ItemList for one listing page; items are (url, label) pairs."""
+        elements = ",".join(f'{{"@type":"ListItem","position":{position},"url":{dumps(url)},"name":{dumps(label)}}}'
+                            for position, (url, label) in enumerate(items, 1))
+        return script_block(
+            f'{{"@context":"https://schema.org","@type":"ItemList","name":{dumps(name)},'
+            f'"itemListElement":[{elements}]}}'
+        )
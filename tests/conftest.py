@@ -0,0 +1,50 @@
+import filecmp
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import bench  # noqa: E402
+import generate_name_pages as gen  # noqa: E402
+
+
+def tree_diff(a: Path, b: Path):
+    """Relative paths of files that exist in only one tree or differ in content."""
+    files_a = {p.relative_to(a) for p in a.rglob("*") if p.is_file()}
+    files_b = {p.relative_to(b) for p in b.rglob("*") if p.is_file()}
+    return sorted(str(p) for p in files_a ^ files_b) + sorted(
+        str(p) for p in files_a & files_b if not filecmp.cmp(a / p, b / p, shallow=False))
+
+
+def build(root: Path, *argv):
+    """Run one deterministic build with root as the workspace."""
+    gen.configure(root)
+    gen.build(gen.parse_args(["--deterministic", "--quiet", *argv]))
+    gen.shared_writer().close()
+
+
+@pytest.fixture
+def catalogue(tmp_path, monkeypatch):
+    """Factory for workspaces holding a synthetic names.csv with no two names sharing a slug."""
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1760000000")
+
+    def make(name, n=400, seed=3):
+        root = tmp_path / name
+        root.mkdir()
+        bench.write_catalogue(root, n, seed)
+        lines = (root / "names.csv").read_text(encoding="utf-8").splitlines()
+        seen, kept = set(), [lines[0]]
+        for line in lines[1:]:
+            slug = gen.slugify(line.split(",")[0])
+            if slug not in seen:
+                seen.add(slug)
+                kept.append(line)
+        (root / "names.csv").write_text("\n".join(kept) + "\n", encoding="utf-8")
+        return root
+
+    yield make
+    gen.shared_writer().close()
+    gen.configure()
@@ -0,0 +1,96 @@
+import json
+
+from conftest import build, gen, tree_diff
+
+OTHER_PHASES = "index,search,categories,letters,sitemap,robots"
+
+
+def test_only_phases_add_up_to_full_build(catalogue):
+    # Rows added since the last build, rendered by a pages-only run, must still reach the
+    # sitemap (and every listing) when the remaining phases run afterwards.
+    full = catalogue("full")
+    build(full)
+
+    split = catalogue("split")
+    csv_text = (split / "names.csv").read_text(encoding="utf-8")
+    lines = csv_text.splitlines(keepends=True)
+    (split / "names.csv").write_text("".join(lines[:300]), encoding="utf-8")
+    build(split)
+    (split / "names.csv").write_text(csv_text, encoding="utf-8")
+    build(split, "--only", "pages")
+    build(split, "--only", OTHER_PHASES)
+
+    assert tree_diff(full / "public", split / "public") == []
+
+
+def test_only_pages_flags_sitemap_entries_as_pending(catalogue):
+    root = catalogue("root", n=50)
+    build(root, "--only", "pages")
+    manifest = json.loads((root / ".build-manifest.json").read_text(encoding="utf-8"))["pages"]
+    assert manifest and all(entry.get("pending") for entry in manifest.values())
+    assert not (root / "public" / "sitemap_index.xml").exists()
+
+    build(root, "--only", "sitemap")
+    manifest = json.loads((root / ".build-manifest.json").read_text(encoding="utf-8"))["pages"]
+    assert not any(entry.get("pending") for entry in manifest.values())
+    sitemap = (root / "public" / "sitemap-names-1.xml").read_text(encoding="utf-8")
+    assert all(f"/names/{slug}.html</loc>" in sitemap for slug in manifest)
+
+
+def test_pool_workers_write_to_the_configured_root(catalogue):
+    # Workers are spawned and re-import the module: they must still write under the configured
+    # public/ directory, not the module's default one.
+    serial, pooled = catalogue("serial", n=200), catalogue("pooled", n=200)
+    build(serial)
+    build(pooled, "--workers", "2", "--chunk-size", "16")
+    assert tree_diff(serial / "public", pooled / "public") == []
+
+
+def test_deterministic_date_change_reaches_skipped_pages(catalogue, monkeypatch):
+    # Identical input and SOURCE_DATE_EPOCH give identical bytes, whatever the previous build was.
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    incremental = catalogue("incremental", n=100)
+    build(incremental)
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1760000000")
+    build(incremental)
+    fresh = catalogue("fresh", n=100)
+    build(fresh)
+    assert tree_diff(incremental / "public", fresh / "public") == []
+
+
+def test_incremental_related_links_match_fresh_build(catalogue, monkeypatch):
+    # Only rows an edit can affect look their related names up again; the rest reuse the
+    # manifest's, and the result must be what a full build writes.
+    incremental = catalogue("incremental", n=600)
+    build(incremental)
+    lines = (incremental / "names.csv").read_text(encoding="utf-8").splitlines()
+    fields = lines[10].split(",")
+    fields[2] = "Sanskrit" if fields[2] != "Sanskrit" else "Latin"
+    lines[10] = ",".join(fields)
+    del lines[20], lines[40]
+    lines.append(lines[30].replace(lines[30].split(",")[0], "Zaraqel", 1))
+    (incremental / "names.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    build(incremental, "--prune")
+
+    fresh = catalogue("fresh", n=600)
+    (fresh / "names.csv").write_text((incremental / "names.csv").read_text(encoding="utf-8"), encoding="utf-8")
+    build(fresh)
+    assert tree_diff(incremental / "public", fresh / "public") == []
+
+    lookups = []
+    related = gen.RelatedIndex.related
+    monkeypatch.setattr(gen.RelatedIndex, "related", lambda self, *a: lookups.append(a) or related(self, *a))
+    build(incremental)
+    assert lookups == []
+
+
+def test_missing_api_documents_are_written_again(catalogue):
+    # A page whose HTML is up to date is still rendered when its JSON document is gone.
+    incremental = catalogue("incremental", n=100)
+    build(incremental, "--api")
+    for path in list((incremental / "public" / "api" / "names").glob("*.json"))[::7]:
+        path.unlink()
+    build(incremental, "--api")
+    fresh = catalogue("fresh", n=100)
+    build(fresh, "--api")
+    assert tree_diff(incremental / "public", fresh / "public") == []
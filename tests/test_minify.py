@@ -0,0 +1,97 @@
+import json
+import random
+import re
+from datetime import date
+from html.parser import HTMLParser
+
+from conftest import gen
+from html_minify import BLOCK_TAGS, minify_css, minify_html
+
+
+def test_whitespace_around_block_tags_is_dropped():
+    assert minify_html("<div>\n  <p>Hi  there</p>\n</div>\n") == "<div><p>Hi  there</p></div>"
+
+
+def test_whitespace_between_inline_elements_collapses_to_one_space():
+    assert minify_html("<span>a</span>\n    <b>b</b>") == "<span>a</span> <b>b</b>"
+
+
+def test_non_breaking_spaces_are_kept():
+    assert minify_html("<p>\n  a\xa0\n</p>") == "<p>a\xa0</p>"
+
+
+def test_pre_and_textarea_are_copied_verbatim():
+    for page in ("<pre>\n  a\n   b\n</pre>", "<TEXTAREA rows=2>\n  keep  \n</TEXTAREA>"):
+        assert minify_html(f"<div>\n{page}\n</div>") == f"<div>{page}</div>"
+
+
+def test_executable_script_is_copied_verbatim():
+    script = "<script>\n  if (a < b) {\n    go();\n  }\n</script>"
+    assert minify_html(script) == script
+
+
+def test_json_ld_script_is_compacted_and_stays_equal():
+    data = {"@type": "Person", "name": "Asha </b>", "sameAs": [1, 2]}
+    page = '<script type="application/ld+json">\n' + json.dumps(data, indent=2) + "\n</script>"
+    out = minify_html(page)
+    body = re.fullmatch(r'<script type="application/ld\+json">(.*)</script>', out, re.S).group(1)
+    assert "\n" not in body and "</" not in body
+    assert json.loads(body) == data
+
+
+def test_invalid_json_script_is_left_alone():
+    page = '<script type="application/ld+json">\n{broken\n</script>'
+    assert minify_html(page) == page
+
+
+def test_comments_are_removed_except_conditional_comments():
+    page = "a<!-- note\n spanning lines -->b<!--[if IE]><p>old</p><![endif]-->"
+    assert minify_html(page) == "ab<!--[if IE]><p>old</p><![endif]-->"
+
+
+def test_style_loses_comments_but_keeps_strings():
+    css = '\n  /* hidden */\n  a > b { color: red; }\n  p::before { content: "a  /* b */" }\n'
+    assert minify_css(css) == 'a>b{color:red;}p::before{content:"a  /* b */"}'
+    assert minify_html(f"<style>{css}</style>") == f"<style>{minify_css(css)}</style>"
+
+
+class _Text(HTMLParser):
+    # Visible text of a page with whitespace runs collapsed and a break at every block tag, as a
+    # browser would lay it out.
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.hidden = 0
+
+    def handle_starttag(self, tag, attrs):
+        self.hidden += tag in ("script", "style")
+        if tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_endtag(self, tag):
+        self.hidden -= tag in ("script", "style")
+        if tag in BLOCK_TAGS:
+            self.parts.append(" ")
+
+    def handle_data(self, data):
+        if not self.hidden:
+            self.parts.append(data)
+
+    def text(self):
+        return " ".join("".join(self.parts).split())
+
+
+def test_generated_pages_keep_their_text():
+    row = {"name": "Asha", "meaning": "Hope <and> life", "origin": "Sanskrit", "gender": "Female",
+           "traits": "kind", "pronunciation": "a-sha"}
+    _slug, page, _lastmod = gen.build_html(row, random.Random(0), date(2025, 1, 1), related=[("Aasha", "aasha")])
+    listing = gen.render_category_page("Girl names", "All girl names", [(f"{gen.SITE_URL}/names/asha.html", "Asha")])
+    for original in (page, listing):
+        minified = minify_html(original)
+        assert len(minified) < len(original)
+        texts = []
+        for html_text in (original, minified):
+            parser = _Text()
+            parser.feed(html_text)
+            texts.append(parser.text())
+        assert texts[0] == texts[1]
@@ -0,0 +1,113 @@
+import argparse
+import random
+import shutil
+
+import pytest
+
+import auto_generate as ag
+from conftest import build, gen, tree_diff
+from name_data import csv_snapshot, diff_csv, load_catalogue
+
+
+def edit_catalogue(root, *argv, steps=20, seed=5):
+    """Apply `steps` random names.csv edits (deletions, and every third an origin change) through
+    apply_edit, the way watch() does."""
+    args = gen.parse_args(["--deterministic", "--quiet", *argv])
+    state = gen.WatchState(gen.iter_csv(gen.CSV_FILE), csv_snapshot(gen.CSV_FILE),
+                           gen.load_manifest(gen.MANIFEST_FILE))
+    rng = random.Random(seed)
+    lines = (root / "names.csv").read_text(encoding="utf-8").splitlines()
+    for step in range(steps):
+        i = rng.randrange(1, len(lines))
+        if step % 3 == 2:
+            fields = lines[i].split(",")
+            fields[2] = rng.choice(["Arabic", "Latin", "Sanskrit"])
+            lines[i] = ",".join(fields)
+        else:
+            del lines[i]
+        (root / "names.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+        snapshot = csv_snapshot(gen.CSV_FILE)
+        gen.apply_edit(state, *diff_csv(state.snapshot, snapshot), args)
+        state.snapshot = snapshot
+    gen.shared_writer().close()
+    gen.save_manifest(gen.MANIFEST_FILE, state.manifest)
+
+
+@pytest.mark.parametrize("flags", [(), ("--minify",), ("--api", "--compress")], ids=["html", "minify", "api-compress"])
+def test_watch_edits_match_fresh_build(catalogue, flags):
+    # Related links, listings (including pages dropped when a listing shrinks), search shards,
+    # the sitemap and any .gz/.br siblings must all end up as a full build of the edited CSV
+    # would write them.
+    flags = ("--category-page-size", "40", *flags)
+    edited = catalogue("edited", n=600)
+    # Pages auto_generate.py publishes are searchable too, unless a CSV row has the name.
+    names = [line.split(",")[0] for line in (edited / "names.csv").read_text(encoding="utf-8").splitlines()[1:]]
+    (edited / "public").mkdir()
+    (edited / "public" / "names_master.txt").write_text("\n".join(names[::3] + ["Zzyzx"]) + "\n", encoding="utf-8")
+    build(edited, *flags)
+    edit_catalogue(edited, *flags)
+
+    fresh = catalogue("fresh")
+    shutil.copy(edited / "names.csv", fresh / "names.csv")
+    shutil.copy(edited / "names_master.txt", fresh / "names_master.txt")
+    (fresh / "public").mkdir()
+    shutil.copy(edited / "public" / "names_master.txt", fresh / "public" / "names_master.txt")
+    build(fresh, *flags)
+
+    assert tree_diff(edited / "public", fresh / "public") == []
+
+
+def use_workspace(monkeypatch, root):
+    """Point auto_generate.py at root (names/, assets/, sitemap.txt and its inputs)."""
+    gen.configure(root)  # snapshots under root/.catalogue-cache
+    for attr, name in [("NAMES_FILE", "names_master.txt"), ("CSV_FILE", "names.csv"), ("NAMES_DIR", "names"),
+                       ("ASSETS_DIR", "assets"), ("SITEMAP_FILE", "sitemap.txt"), ("REPORT_FILE", "report.json")]:
+        monkeypatch.setattr(ag, attr, str(root / name))
+    load_catalogue.cache_clear()
+    return argparse.Namespace(
+        compress=True, minify=False, quiet=True, report=str(root / "report.json"), profile=None)
+
+
+def test_auto_generate_watch_updates_match_fresh_pass(catalogue, monkeypatch):
+    # Added, removed and re-described names, and origin edits that move related links, must leave
+    # names/ and sitemap.txt as a fresh pass over the edited files writes them.
+    edited = catalogue("edited", n=500)
+    args = use_workspace(monkeypatch, edited)
+    ag.generate(args)
+    state = ag.WatchState(ag.load_names())
+
+    rng = random.Random(7)
+    master = (edited / "names_master.txt").read_text(encoding="utf-8").splitlines()
+    rows = (edited / "names.csv").read_text(encoding="utf-8").splitlines()
+    for step in range(12):
+        if step % 3 == 0:
+            del master[rng.randrange(len(master))]
+            master.append(f"Zyq{step}")
+        else:
+            i = rng.randrange(1, len(rows))
+            fields = rows[i].split(",")
+            fields[1 + step % 3] = rng.choice(["Arabic", "Latin", "Sanskrit", "Bright", "Calm"])
+            rows[i] = ",".join(fields)
+        (edited / "names_master.txt").write_text("\n".join(master) + "\n", encoding="utf-8")
+        (edited / "names.csv").write_text("\n".join(rows) + "\n", encoding="utf-8")
+        load_catalogue.cache_clear()
+        state = ag.update(state, args)
+    ag.shared_writer().close()
+
+    fresh = catalogue("fresh")
+    for name in ("names.csv", "names_master.txt"):
+        shutil.copy(edited / name, fresh / name)
+    ag.generate(use_workspace(monkeypatch, fresh))
+    ag.shared_writer().close()
+    assert tree_diff(edited / "names", fresh / "names") == []
+    assert tree_diff(edited / "assets", fresh / "assets") == []
+    assert (edited / "sitemap.txt").read_bytes() == (fresh / "sitemap.txt").read_bytes()
+
+
+def test_watch_detects_slug_collisions():
+    state = gen.WatchState([{"name": "Daa", "origin": "Arabic", "gender": "Female"}], None, {})
+    assert not state.collisions
+    assert state.collides({"daaä": {"name": "Daaä", "origin": "Latin", "gender": "Male"}})
+    assert not state.collides({"daa": {"name": "DAA", "origin": "Latin", "gender": "Male"}})
+    state.add({"name": "Daaä", "origin": "Latin", "gender": "Male"})
+    assert state.collisions == {"daa"}